@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Daily sales rollups maintained incrementally as orders are placed and updated"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from pymongo import UpdateOne
+
+from database import products_collection, sales_rollups_collection, ORDER_COLLECTIONS
+
+logger = logging.getLogger(__name__)
+
+# Orders processed per bulk write during a backfill
+BACKFILL_BATCH_SIZE = 500
+
+# Breakdowns kept on every daily rollup document
+DIMENSIONS = ("byCategory", "byStyle", "bySize", "byColor")
+
+def _key(value: Any) -> str:
+    """Make a value safe to use as a Mongo field name"""
+    return str(value or "unknown").replace(".", "_").replace("$", "_")
+
+def rollup_day(created_at: Any) -> str:
+    """Rollup document id for an order creation time"""
+    if isinstance(created_at, datetime):
+        return created_at.strftime("%Y-%m-%d")
+    return datetime.utcnow().strftime("%Y-%m-%d")
+
+def _add_line(increments: Dict[str, Any], category: str, style: str, size: str,
+              color: str, units: int, revenue: float):
+    for dimension, value in zip(DIMENSIONS, (category, style, size, color)):
+        increments[f"{dimension}.{_key(value)}.units"] += units
+        increments[f"{dimension}.{_key(value)}.revenue"] += revenue
+    increments["units"] += units
+
+def order_increments(order: Dict[str, Any], products: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Compute the $inc document an order contributes to its daily rollup
+
+    Counts (orders, units, statuses) stay integers; only revenue amounts are floats.
+    """
+    increments: Dict[str, Any] = defaultdict(int)
+    increments["orders"] += 1
+    increments[f"byStatus.{_key(order.get('status', 'pending'))}"] += 1
+
+    if order.get("type") == "custom_order":
+        revenue = float(order.get("totalPrice", 0) or 0)
+        increments["customOrders"] += 1
+        _add_line(increments, "custom", order.get("shirtStyle"), order.get("size"),
+                  order.get("shirtColor"), int(order.get("quantity", 1) or 0), revenue)
+    else:
+        revenue = float(order.get("totalAmount", 0) or 0)
+        increments["regularOrders"] += 1
+        for item in order.get("items", []):
+            product = products.get(item.get("productId"), {})
+            _add_line(increments, product.get("category"), product.get("type"),
+                      item.get("selectedSize"), item.get("selectedColor"),
+                      int(item.get("quantity", 0) or 0), float(item.get("totalPrice", 0) or 0))
+
+    increments["revenue"] += revenue
+    return increments
+
+async def _product_lookup(product_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    query = {"id": {"$in": list(set(product_ids))}}
+    products = await products_collection.find(query, {"_id": 0, "id": 1, "category": 1, "type": 1}).to_list(None)
+    return {product["id"]: product for product in products}
+
+def _rollup_update(day: str, increments: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "$inc": dict(increments),
+        "$set": {"updatedAt": datetime.utcnow()},
+        "$setOnInsert": {"date": datetime.strptime(day, "%Y-%m-%d")}
+    }
+
+async def record_order_created(order: Dict[str, Any]):
+    """Add a newly placed order to its daily rollup"""
+    try:
+        products = {}
+        if order.get("type") != "custom_order":
+            products = await _product_lookup(item.get("productId") for item in order.get("items", []))
+        day = rollup_day(order.get("createdAt"))
+        await sales_rollups_collection.update_one(
+            {"_id": day}, _rollup_update(day, order_increments(order, products)), upsert=True
+        )
+    except Exception as e:
+        logger.error(f"Failed to update sales rollup for order {order.get('orderId')}: {e}")
+
+def status_increments(order: Dict[str, Any], old_status: str, new_status: str) -> Dict[str, Any]:
+    """Compute the $inc document for an order moving between statuses"""
+    total = float(order.get("totalPrice", order.get("totalAmount", 0)) or 0)
+    increments: Dict[str, Any] = defaultdict(int)
+    increments[f"byStatus.{_key(old_status)}"] -= 1
+    increments[f"byStatus.{_key(new_status)}"] += 1
+    if new_status == "cancelled":
+        increments["cancelledRevenue"] += total
+    elif old_status == "cancelled":
+        increments["cancelledRevenue"] -= total
+    return increments
+
+async def record_status_change(order: Dict[str, Any], new_status: str):
+    """Move an order between status buckets on the rollup for the day it was placed"""
+    try:
+        old_status = order.get("status", "pending")
+        if old_status == new_status:
+            return
+        day = rollup_day(order.get("createdAt"))
+        await sales_rollups_collection.update_one(
+            {"_id": day}, _rollup_update(day, status_increments(order, old_status, new_status)), upsert=True
+        )
+    except Exception as e:
+        logger.error(f"Failed to update sales rollup for order {order.get('orderId')}: {e}")
+
+async def record_status_changes(orders: Iterable[Dict[str, Any]], new_status: str):
+    """Apply a batch of status moves to the daily rollups in one bulk write"""
+    days: Dict[str, Dict[str, Any]] = {}
+    for order in orders:
+        old_status = order.get("status", "pending")
+        if old_status == new_status:
+            continue
+        increments = days.setdefault(rollup_day(order.get("createdAt")), defaultdict(int))
+        for key, value in status_increments(order, old_status, new_status).items():
+            increments[key] += value
+    try:
+        await _flush_rollups(days)
+    except Exception as e:
+        logger.error(f"Failed to update sales rollups for {len(days)} day(s): {e}")
+
+async def get_sales_rollups(date_from: Optional[datetime] = None, date_to: Optional[datetime] = None):
+    """Read daily rollups from the day of date_from up to, not including, the day of date_to
+
+    Matches the exclusive `to` of the order filters and the backfill; rollups are per UTC day.
+    """
+    query: Dict[str, Any] = {}
+    if date_from or date_to:
+        query["_id"] = {}
+        if date_from:
+            query["_id"]["$gte"] = rollup_day(date_from)
+        if date_to:
+            query["_id"]["$lt"] = rollup_day(date_to)
+    return await sales_rollups_collection.find(query).sort("_id", 1).to_list(None)
+
+def merge_rollups(rollups: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum a list of daily rollups into a single totals document"""
+    totals: Dict[str, Any] = {}
+
+    def merge(target: Dict[str, Any], source: Dict[str, Any]):
+        for key, value in source.items():
+            if isinstance(value, dict):
+                merge(target.setdefault(key, {}), value)
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                target[key] = target.get(key, 0) + value
+
+    for rollup in rollups:
+        merge(totals, {k: v for k, v in rollup.items() if k not in ("_id", "date", "updatedAt")})
+    return totals
+
+async def backfill_rollups(date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                           batch_size: int = BACKFILL_BATCH_SIZE):
+    """Rebuild daily rollups from order history (active and archived), batching reads and writes"""
+    # Rollups are per day, so only whole days can be rebuilt
+    if date_from:
+        date_from = datetime.strptime(rollup_day(date_from), "%Y-%m-%d")
+    if date_to:
+        date_to = datetime.strptime(rollup_day(date_to), "%Y-%m-%d")
+
+    query: Dict[str, Any] = {}
+    if date_from or date_to:
+        query["createdAt"] = {}
+        if date_from:
+            query["createdAt"]["$gte"] = date_from
+        if date_to:
+            query["createdAt"]["$lt"] = date_to
+
+    products = {
+        product["id"]: product
+        async for product in products_collection.find({}, {"_id": 0, "id": 1, "category": 1, "type": 1})
+    }
+
+    # Clear the days being rebuilt so the backfill is repeatable
+    clear: Dict[str, Any] = {}
+    if date_from or date_to:
+        clear["_id"] = {}
+        if date_from:
+            clear["_id"]["$gte"] = rollup_day(date_from)
+        if date_to:
+            clear["_id"]["$lt"] = rollup_day(date_to)
+    await sales_rollups_collection.delete_many(clear)
+
+    processed = 0
+    for collection, order_type in ORDER_COLLECTIONS:
+        days: Dict[str, Dict[str, Any]] = {}
+        cursor = collection.find(query).batch_size(batch_size)
+        async for order in cursor:
+            order.setdefault("type", order_type)
+            day = rollup_day(order.get("createdAt"))
+            increments = days.setdefault(day, defaultdict(int))
+            for key, value in order_increments(order, products).items():
+                increments[key] += value
+            processed += 1
+            if processed % batch_size == 0:
+                await _flush_rollups(days)
+                days = {}
+        await _flush_rollups(days)
+
+    logger.info(f"Rebuilt sales rollups from {processed} orders")
+    return processed
+
+async def _flush_rollups(days: Dict[str, Dict[str, Any]]):
+    if not days:
+        return
+    await sales_rollups_collection.bulk_write(
+        [UpdateOne({"_id": day}, _rollup_update(day, increments), upsert=True) for day, increments in days.items()],
+        ordered=False
+    )
+
+if __name__ == "__main__":
+    import sys
+    days_back = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    start = datetime.utcnow() - timedelta(days=days_back) if days_back else None
+    count = asyncio.run(backfill_rollups(date_from=start))
+    print(f"✅ Rebuilt sales rollups from {count} orders")
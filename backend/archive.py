@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Move finished orders out of the active order collections
+
+Orders in a final status (completed, cancelled, delivered) older than ARCHIVE_AFTER_DAYS are copied
+to `orders_archive` / `custom_orders_archive` and removed from the active collections in batches.
+Each collection's progress is checkpointed in `archive_checkpoints`, so an interrupted or
+time-limited run resumes where it stopped with the same cutoff. Lookups by orderId, payment
+intent and customer email fall back to the archive (see database.py).
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from pymongo import ASCENDING, DESCENDING, DeleteOne, ReplaceOne
+
+from database import (
+    db, orders_collection, custom_orders_collection,
+    orders_archive_collection, custom_orders_archive_collection
+)
+
+logger = logging.getLogger(__name__)
+
+checkpoints_collection = db.archive_checkpoints
+
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "180"))
+ARCHIVE_STATUSES = ["completed", "cancelled", "delivered"]
+BATCH_SIZE = 500
+
+# Seconds one API-triggered run may spend before returning; keeps it under the 30s function limit
+REQUEST_TIME_BUDGET = 20
+
+# (checkpoint id, active collection, archive collection)
+ARCHIVES = (
+    ("orders", orders_collection, orders_archive_collection),
+    ("custom_orders", custom_orders_collection, custom_orders_archive_collection),
+)
+
+async def ensure_archive_indexes():
+    """Indexes for the lookups that fall back to the archive collections"""
+    for collection in (orders_archive_collection, custom_orders_archive_collection):
+        await collection.create_index([("orderId", ASCENDING)])
+        await collection.create_index([("emailLower", ASCENDING), ("createdAt", DESCENDING)])
+        await collection.create_index([("paymentIntentId", ASCENDING)], sparse=True)
+
+async def _start_or_resume(name: str, after_days: int) -> Dict[str, Any]:
+    """The unfinished checkpoint for a collection, or a new one with a fresh cutoff"""
+    checkpoint = await checkpoints_collection.find_one({"_id": name, "finishedAt": None})
+    if checkpoint is not None:
+        return checkpoint
+    now = datetime.utcnow()
+    checkpoint = {"_id": name, "cutoff": now - timedelta(days=after_days), "after": None,
+                  "afterId": None, "archived": 0, "startedAt": now, "updatedAt": now, "finishedAt": None}
+    await checkpoints_collection.replace_one({"_id": name}, checkpoint, upsert=True)
+    return checkpoint
+
+async def _archive_batch(source, archive, orders) -> int:
+    """Copy a batch to the archive, then remove the copies that are unchanged from the active collection"""
+    now = datetime.utcnow()
+    await archive.bulk_write(
+        [ReplaceOne({"_id": order["_id"]}, {**order, "archivedAt": now}, upsert=True) for order in orders],
+        ordered=False
+    )
+    # Only delete orders nobody touched since they were read; the rest stay active
+    result = await source.bulk_write(
+        [DeleteOne({"_id": order["_id"], "status": order["status"], "updatedAt": order.get("updatedAt")})
+         for order in orders],
+        ordered=False
+    )
+    if result.deleted_count < len(orders):
+        ids = [order["_id"] for order in orders]
+        kept = [order["_id"] async for order in source.find({"_id": {"$in": ids}}, {"_id": 1})]
+        if kept:
+            await archive.delete_many({"_id": {"$in": kept}})
+    return result.deleted_count
+
+async def archive_collection(name: str, source, archive, after_days: int = ARCHIVE_AFTER_DAYS,
+                             batch_size: int = BATCH_SIZE, deadline: Optional[float] = None) -> Dict[str, Any]:
+    """Archive one collection in batches until done or past the deadline (a loop.time() value)"""
+    checkpoint = await _start_or_resume(name, after_days)
+    loop = asyncio.get_running_loop()
+    while deadline is None or loop.time() < deadline:
+        query: Dict[str, Any] = {"status": {"$in": ARCHIVE_STATUSES}, "createdAt": {"$lt": checkpoint["cutoff"]}}
+        if checkpoint["after"] is not None:
+            # Resume after the last (createdAt, _id) read, so orders kept back in a batch of equal
+            # timestamps are not read again
+            same_time: Dict[str, Any] = {"createdAt": checkpoint["after"]}
+            if checkpoint.get("afterId") is not None:
+                same_time["_id"] = {"$gt": checkpoint["afterId"]}
+            query["$or"] = [{"createdAt": {"$gt": checkpoint["after"]}}, same_time]
+        orders = await source.find(query).sort([("createdAt", 1), ("_id", 1)]).limit(batch_size).to_list(batch_size)
+
+        update: Dict[str, Any] = {"updatedAt": datetime.utcnow()}
+        if orders:
+            checkpoint["archived"] += await _archive_batch(source, archive, orders)
+            checkpoint["after"], checkpoint["afterId"] = orders[-1]["createdAt"], orders[-1]["_id"]
+            update.update(archived=checkpoint["archived"], after=checkpoint["after"], afterId=checkpoint["afterId"])
+        if len(orders) < batch_size:
+            checkpoint["finishedAt"] = update["finishedAt"] = datetime.utcnow()
+        await checkpoints_collection.update_one({"_id": name}, {"$set": update})
+        if checkpoint["finishedAt"]:
+            logger.info(f"Archived {checkpoint['archived']} {name} created before {checkpoint['cutoff']:%Y-%m-%d}")
+            break
+
+    return {"archived": checkpoint["archived"], "cutoff": checkpoint["cutoff"],
+            "done": checkpoint["finishedAt"] is not None}
+
+async def archive_orders(after_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = BATCH_SIZE,
+                         max_seconds: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+    """Archive regular and custom orders; with max_seconds, stop early and resume on the next call"""
+    deadline = asyncio.get_running_loop().time() + max_seconds if max_seconds else None
+    results = {}
+    for name, source, archive in ARCHIVES:
+        results[name] = await archive_collection(name, source, archive, after_days, batch_size, deadline)
+        if not results[name]["done"]:
+            break
+    return results
+
+if __name__ == "__main__":
+    import sys
+    after_days = int(sys.argv[1]) if len(sys.argv) > 1 else ARCHIVE_AFTER_DAYS
+    results = asyncio.run(archive_orders(after_days))
+    for name, result in results.items():
+        print(f"✅ Archived {result['archived']} {name} created before {result['cutoff']:%Y-%m-%d}")
@@ -0,0 +1,64 @@
+"""Pre-serialized catalog responses (products and categories) shared across requests
+
+The catalog changes rarely, so list responses are validated and serialized once and reused until
+they expire, a product is changed through the API or stock moves (see inventory.py). Each body carries an ETag derived from its
+content, which also lets CompressionMiddleware reuse the compressed form.
+"""
+
+import hashlib
+import os
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+# Seconds a serialized catalog response is reused; 0 disables the cache
+CATALOG_CACHE_TTL = float(os.environ.get("CATALOG_CACHE_TTL", "30"))
+
+# Category ids come from the URL, so the number of cached bodies is bounded
+MAX_ENTRIES = 256
+
+# key -> (expires_at, body, etag)
+_entries: Dict[Hashable, Tuple[float, bytes, str]] = {}
+
+# Bumped by every invalidation; a load that started under an older generation is not cached
+_generation = 0
+
+@lru_cache(maxsize=None)
+def _adapter(response_type: Any) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+def serialize(response_type: Any, data: Any) -> Tuple[bytes, str]:
+    """Validate data against the response type and return (JSON body, ETag)"""
+    adapter = _adapter(response_type)
+    body = adapter.dump_json(adapter.validate_python(data))
+    return body, '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+async def catalog_response(key: Hashable, load: Callable[[], Awaitable[Any]], response_type: Any) -> Response:
+    """JSON response for a catalog read, serialized at most once per TTL"""
+    now = time.monotonic()
+    entry = _entries.get(key)
+    if entry is None or entry[0] <= now:
+        generation = _generation
+        body, etag = serialize(response_type, await load())
+        entry = (now + CATALOG_CACHE_TTL, body, etag)
+        if CATALOG_CACHE_TTL > 0 and generation == _generation:
+            if len(_entries) >= MAX_ENTRIES:
+                _entries.clear()
+            _entries[key] = entry
+    return Response(entry[1], media_type="application/json", headers={"ETag": entry[2]})
+
+def invalidate_catalog():
+    """Drop every cached catalog response (after a product or category change)"""
+    global _generation
+    _generation += 1
+    _entries.clear()
+
+def invalidate_products():
+    """Drop the cached product lists (after a stock change); the category list stays cached"""
+    global _generation
+    _generation += 1
+    for key in [key for key in _entries if key[0] in ("products", "category")]:
+        del _entries[key]
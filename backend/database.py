@@ -1,14 +1,21 @@
 import os
+import asyncio
+import copy
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import List, Optional, Dict, Any
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from typing import List, Optional, Dict, Any, Awaitable, Callable, Hashable
 from datetime import datetime
 import logging
 
+import metrics
+from monitoring import EVENT_LISTENERS
+
 logger = logging.getLogger(__name__)
 
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=EVENT_LISTENERS)
 db = client[os.environ.get('DB_NAME', 'thornedmagnolia')]
 
 # Collections
@@ -17,164 +24,188 @@ categories_collection = db.categories
 carts_collection = db.carts
 custom_orders_collection = db.custom_orders
 orders_collection = db.orders
+orders_archive_collection = db.orders_archive
+custom_orders_archive_collection = db.custom_orders_archive
+sales_rollups_collection = db.sales_rollups
+stripe_events_collection = db.stripe_events
+payment_intents_collection = db.payment_intents
+inventory_collection = db.inventory
+inventory_reservations_collection = db.inventory_reservations
+
+# Fields returned by the admin list views in summary mode
+ORDER_SUMMARY_PROJECTION = {
+    "_id": 1, "orderId": 1, "customerEmail": 1, "status": 1,
+    "totalAmount": 1, "type": 1, "createdAt": 1
+}
+CUSTOM_ORDER_SUMMARY_PROJECTION = {
+    "_id": 1, "orderId": 1, "customerName": 1, "email": 1, "status": 1,
+    "totalPrice": 1, "shirtStyle": 1, "createdAt": 1
+}
+
+def _summary_rows(orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Expose each summary row's _id as `id`, the same id order creation returns"""
+    for order in orders:
+        order["id"] = str(order.pop("_id"))
+    return orders
+
+async def ensure_indexes():
+    """Create indexes backing the storefront and admin queries"""
+    await products_collection.create_index([("id", ASCENDING)])
+    await products_collection.create_index([("category", ASCENDING)])
+    await categories_collection.create_index([("displayOrder", ASCENDING)])
+    await carts_collection.create_index([("sessionId", ASCENDING)])
+
+    # Admin list views: equality filters first, then the createdAt sort key
+    await orders_collection.create_index([("createdAt", DESCENDING)])
+    await orders_collection.create_index([("status", ASCENDING), ("createdAt", DESCENDING)])
+    await orders_collection.create_index([("type", ASCENDING), ("createdAt", DESCENDING)])
+    await orders_collection.create_index([("emailLower", ASCENDING), ("createdAt", DESCENDING)])
+    await orders_collection.create_index([("orderId", ASCENDING)])
+
+    await custom_orders_collection.create_index([("createdAt", DESCENDING)])
+    await custom_orders_collection.create_index([("status", ASCENDING), ("createdAt", DESCENDING)])
+    await custom_orders_collection.create_index([("shirtStyle", ASCENDING), ("createdAt", DESCENDING)])
+    await custom_orders_collection.create_index([("emailLower", ASCENDING), ("createdAt", DESCENDING)])
+    await custom_orders_collection.create_index([("orderId", ASCENDING)])
+
+    # Payment reconciliation from Stripe webhooks
+    await orders_collection.create_index([("paymentIntentId", ASCENDING)], sparse=True)
+    await custom_orders_collection.create_index([("paymentIntentId", ASCENDING)], sparse=True)
+    await stripe_events_collection.create_index([("eventId", ASCENDING)], unique=True)
+    await stripe_events_collection.create_index([("status", ASCENDING), ("receivedAt", ASCENDING)])
+    await payment_intents_collection.create_index([("sessionKey", ASCENDING)], unique=True)
+    await payment_intents_collection.create_index([("paymentIntentId", ASCENDING)])
+
+def normalize_email(email: Optional[str]) -> str:
+    """Canonical form of an email address used for customer lookups"""
+    return (email or "").strip().lower()
+
+async def migrate_normalized_emails():
+    """Backfill emailLower on orders written before it was stored"""
+    for collection, field in ((orders_collection, "$customerEmail"), (custom_orders_collection, "$email")):
+        result = await collection.update_many(
+            {"emailLower": {"$exists": False}},
+            [{"$set": {"emailLower": {"$toLower": {"$trim": {"input": {"$ifNull": [field, ""]}}}}}}]
+        )
+        if result.modified_count:
+            logger.info(f"Backfilled emailLower on {result.modified_count} {collection.name} document(s)")
+
+def build_order_filter(status: Optional[str] = None, date_from: Optional[datetime] = None,
+                       date_to: Optional[datetime] = None, customer: Optional[str] = None,
+                       extra: Optional[Dict[str, Any]] = None):
+    """Build a Mongo filter for the admin order list views"""
+    query: Dict[str, Any] = {}
+    if status:
+        query["status"] = status
+    if customer:
+        query["emailLower"] = normalize_email(customer)
+    if date_from or date_to:
+        created = {}
+        if date_from:
+            created["$gte"] = date_from
+        if date_to:
+            created["$lt"] = date_to
+        query["createdAt"] = created
+    if extra:
+        query.update({k: v for k, v in extra.items() if v is not None})
+    return query
 
 async def init_database():
-    """Initialize database with default data"""
-    try:
-        # Check if categories exist, if not create them
-        categories_count = await categories_collection.count_documents({})
-        if categories_count == 0:
-            default_categories = [
-                {"id": "teachers", "name": "Teachers", "description": "Inspiring designs for educators", "displayOrder": 1},
-                {"id": "mamas", "name": "Mamas", "description": "Celebrating motherhood", "displayOrder": 2},
-                {"id": "seasons", "name": "Seasons", "description": "Seasonal favorites", "displayOrder": 3},
-                {"id": "quotes", "name": "Quotes", "description": "Motivational sayings", "displayOrder": 4},
-                {"id": "graphic", "name": "Graphic", "description": "Bold graphic designs", "displayOrder": 5},
-                {"id": "dads", "name": "Dads", "description": "Dedicated to fathers", "displayOrder": 6},
-                {"id": "embroidery", "name": "Embroidery", "description": "Elegant embroidered pieces", "displayOrder": 7},
-                {"id": "seniors", "name": "Seniors", "description": "Class of 2025 and beyond", "displayOrder": 8},
-                {"id": "holidays", "name": "Holidays", "description": "Festive holiday themes", "displayOrder": 9},
-                {"id": "gamer", "name": "Gamer", "description": "Gaming enthusiasts", "displayOrder": 10},
-                {"id": "worship", "name": "Worship", "description": "Faith-based designs", "displayOrder": 11},
-                {"id": "gameday", "name": "Gameday", "description": "Sports and team spirit", "displayOrder": 12}
-            ]
-            await categories_collection.insert_many(default_categories)
-            logger.info("Default categories created")
-
-        # Check if products exist, if not create sample products
-        products_count = await products_collection.count_documents({})
-        if products_count == 0:
-            sample_products = [
-                {
-                    "id": "1",
-                    "name": "World's Best Teacher",
-                    "category": "teachers",
-                    "price": 20,
-                    "image": "https://via.placeholder.com/400x400/C4B5A0/2C2C2C?text=Teacher+Shirt",
-                    "colors": ["Black", "Grey", "White", "Beige", "Blue", "Red"],
-                    "sizes": ["S", "M", "L", "XL", "2XL", "3XL", "4XL"],
-                    "type": "tshirt",
-                    "inStock": True,
-                    "createdAt": datetime.utcnow(),
-                    "updatedAt": datetime.utcnow()
-                },
-                {
-                    "id": "2", 
-                    "name": "Mama Bear",
-                    "category": "mamas",
-                    "price": 20,
-                    "image": "https://via.placeholder.com/400x400/D4C4B0/2C2C2C?text=Mama+Bear",
-                    "colors": ["Black", "Grey", "White", "Beige", "Blue", "Red"],
-                    "sizes": ["S", "M", "L", "XL", "2XL", "3XL", "4XL"],
-                    "type": "tshirt",
-                    "inStock": True,
-                    "createdAt": datetime.utcnow(),
-                    "updatedAt": datetime.utcnow()
-                },
-                {
-                    "id": "3",
-                    "name": "Fall Vibes",
-                    "category": "seasons", 
-                    "price": 20,
-                    "image": "https://via.placeholder.com/400x400/8B7D6B/FAF9F7?text=Fall+Vibes",
-                    "colors": ["Black", "Grey", "White", "Beige", "Blue", "Red"],
-                    "sizes": ["S", "M", "L", "XL", "2XL", "3XL", "4XL"],
-                    "type": "tshirt",
-                    "inStock": True,
-                    "createdAt": datetime.utcnow(),
-                    "updatedAt": datetime.utcnow()
-                },
-                {
-                    "id": "4",
-                    "name": "Be Kind",
-                    "category": "quotes",
-                    "price": 20,
-                    "image": "https://via.placeholder.com/400x400/C4B5A0/FAF9F7?text=Be+Kind",
-                    "colors": ["Black", "Grey", "White", "Beige", "Blue", "Red"],
-                    "sizes": ["S", "M", "L", "XL", "2XL", "3XL", "4XL"],
-                    "type": "tshirt",
-                    "inStock": True,
-                    "createdAt": datetime.utcnow(),
-                    "updatedAt": datetime.utcnow()
-                },
-                {
-                    "id": "5",
-                    "name": "Retro Sunset",
-                    "category": "graphic",
-                    "price": 20,
-                    "image": "https://via.placeholder.com/400x400/6B4E37/FAF9F7?text=Retro+Sunset",
-                    "colors": ["Black", "Grey", "White", "Beige", "Blue", "Red"],
-                    "sizes": ["S", "M", "L", "XL", "2XL", "3XL", "4XL"],
-                    "type": "tshirt",
-                    "inStock": True,
-                    "createdAt": datetime.utcnow(),
-                    "updatedAt": datetime.utcnow()
-                },
-                {
-                    "id": "6",
-                    "name": "Dad Joke Loading",
-                    "category": "dads",
-                    "price": 20,
-                    "image": "https://via.placeholder.com/400x400/2C2C2C/FAF9F7?text=Dad+Jokes",
-                    "colors": ["Black", "Grey", "White", "Beige", "Blue", "Red"],
-                    "sizes": ["S", "M", "L", "XL", "2XL", "3XL", "4XL"],
-                    "type": "tshirt",
-                    "inStock": True,
-                    "createdAt": datetime.utcnow(),
-                    "updatedAt": datetime.utcnow()
-                },
-                {
-                    "id": "7",
-                    "name": "Cozy Fall Sweatshirt",
-                    "category": "seasons",
-                    "price": 25,
-                    "image": "https://via.placeholder.com/400x400/C4B5A0/2C2C2C?text=Cozy+Sweatshirt",
-                    "colors": ["Black", "Grey", "White", "Beige", "Blue", "Red"],
-                    "sizes": ["S", "M", "L", "XL", "2XL", "3XL", "4XL"],
-                    "type": "sweatshirt",
-                    "inStock": True,
-                    "createdAt": datetime.utcnow(),
-                    "updatedAt": datetime.utcnow()
-                },
-                {
-                    "id": "8",
-                    "name": "Mama Life Sweatshirt",
-                    "category": "mamas",
-                    "price": 25,
-                    "image": "https://via.placeholder.com/400x400/D4C4B0/2C2C2C?text=Mama+Life",
-                    "colors": ["Black", "Grey", "White", "Beige", "Blue", "Red"],
-                    "sizes": ["S", "M", "L", "XL", "2XL", "3XL", "4XL"],
-                    "type": "sweatshirt",
-                    "inStock": True,
-                    "createdAt": datetime.utcnow(),
-                    "updatedAt": datetime.utcnow()
-                }
-            ]
-            await products_collection.insert_many(sample_products)
-            logger.info("Sample products created")
-
-    except Exception as e:
-        logger.error(f"Error initializing database: {e}")
+    """Initialize database: apply pending migrations (indexes, seed data, backfills)
+
+    Failures propagate, so the caller can retry instead of running against a half-migrated database.
+    """
+    # Imported here because migrations builds on the collections defined in this module
+    from migrations import run_migrations
+    await run_migrations()
+
+# Single-flight reads: concurrent calls with the same key share one in-flight query
+_inflight: Dict[Hashable, asyncio.Task] = {}
+
+def _discard_inflight(key: Hashable, task: asyncio.Task):
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()  # Retrieved here so an error nobody awaited is not logged as unhandled
+
+async def single_flight(key: Hashable, load: Callable[[], Awaitable[Any]]):
+    """Run load() once for all concurrent callers with the same key (key[0] names the resource)
+
+    Followers get a deep copy of the leader's result so callers can still mutate what they get.
+    The query runs in its own task, so a caller disconnecting does not cancel it for the others.
+    """
+    task = _inflight.get(key)
+    if task is not None:
+        metrics.singleflight_calls.inc(key[0], "coalesced")
+        return copy.deepcopy(await asyncio.shield(task))
+    metrics.singleflight_calls.inc(key[0], "leader")
+    task = asyncio.ensure_future(load())
+    _inflight[key] = task
+    task.add_done_callback(lambda done: _discard_inflight(key, done))
+    return await asyncio.shield(task)
+
+def forget_inflight(*resources: str):
+    """Stop sharing in-flight reads of these resources, so reads after a write see the write"""
+    for key in [key for key in _inflight if key[0] in resources]:
+        del _inflight[key]
+
+def _forget_cart(session_id: str):
+    _inflight.pop(("cart", session_id), None)
 
 # Product CRUD operations
+def products_with_availability(match: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Aggregation pipeline that joins each product's inventory in the same query
+
+    Tracked products get `variants` (color, size, available) and an `inStock` derived from them;
+    products with no inventory documents keep their stored `inStock`.
+    """
+    return [
+        {"$match": match},
+        {"$lookup": {"from": "inventory", "localField": "id", "foreignField": "productId", "as": "_inventory"}},
+        {"$addFields": {
+            "variants": {"$cond": [
+                {"$gt": [{"$size": "$_inventory"}, 0]},
+                {"$map": {"input": "$_inventory", "in": {
+                    "color": "$$this.color", "size": "$$this.size", "available": "$$this.available"
+                }}},
+                "$$REMOVE"
+            ]},
+            "inStock": {"$cond": [
+                {"$gt": [{"$size": "$_inventory"}, 0]},
+                {"$anyElementTrue": [{"$map": {"input": "$_inventory", "in": {"$gt": ["$$this.available", 0]}}}]},
+                {"$ifNull": ["$inStock", True]}
+            ]}
+        }},
+        {"$project": {"_inventory": 0}},
+    ]
+
 async def get_all_products():
     """Get all products"""
-    products = await products_collection.find({}).to_list(1000)
-    return products
+    return await single_flight(
+        ("products",), lambda: products_collection.aggregate(products_with_availability({})).to_list(1000)
+    )
+
+async def _find_product(product_id: str):
+    products = await products_collection.aggregate(
+        products_with_availability({"id": product_id}) + [{"$limit": 1}]
+    ).to_list(1)
+    return products[0] if products else None
 
 async def get_product_by_id(product_id: str):
     """Get product by ID"""
-    product = await products_collection.find_one({"id": product_id})
-    return product
+    return await single_flight(("product", product_id), lambda: _find_product(product_id))
 
 async def get_products_by_category(category_id: str):
     """Get products by category"""
-    products = await products_collection.find({"category": category_id}).to_list(1000)
-    return products
+    return await single_flight(
+        ("products_by_category", category_id),
+        lambda: products_collection.aggregate(products_with_availability({"category": category_id})).to_list(1000)
+    )
 
 async def create_product(product_data: dict):
     """Create new product"""
     result = await products_collection.insert_one(product_data)
+    forget_inflight("products", "products_by_category")
     return result.inserted_id
 
 async def update_product(product_id: str, update_data: dict):
@@ -184,24 +215,26 @@ async def update_product(product_id: str, update_data: dict):
         {"id": product_id}, 
         {"$set": update_data}
     )
+    forget_inflight("products", "product", "products_by_category")
     return result.modified_count > 0
 
 async def delete_product(product_id: str):
     """Delete product"""
     result = await products_collection.delete_one({"id": product_id})
+    forget_inflight("products", "product", "products_by_category")
     return result.deleted_count > 0
 
 # Category CRUD operations
 async def get_all_categories():
     """Get all categories"""
-    categories = await categories_collection.find({}).sort("displayOrder", 1).to_list(1000)
-    return categories
+    return await single_flight(
+        ("categories",), lambda: categories_collection.find({}).sort("displayOrder", 1).to_list(1000)
+    )
 
 # Cart operations
 async def get_cart(session_id: str):
     """Get cart by session ID"""
-    cart = await carts_collection.find_one({"sessionId": session_id})
-    return cart
+    return await single_flight(("cart", session_id), lambda: carts_collection.find_one({"sessionId": session_id}))
 
 async def add_to_cart(cart_item: dict):
     """Add item to cart or update existing cart"""
@@ -233,6 +266,7 @@ async def add_to_cart(cart_item: dict):
         
         existing_cart["updatedAt"] = datetime.utcnow()
         await carts_collection.replace_one({"sessionId": cart_item["sessionId"]}, existing_cart)
+        _forget_cart(cart_item["sessionId"])
         return existing_cart
     else:
         # Create new cart
@@ -250,6 +284,7 @@ async def add_to_cart(cart_item: dict):
             "updatedAt": datetime.utcnow()
         }
         await carts_collection.insert_one(new_cart)
+        _forget_cart(cart_item["sessionId"])
         return new_cart
 
 async def update_cart_item(session_id: str, item_index: int, update_data: dict):
@@ -261,6 +296,7 @@ async def update_cart_item(session_id: str, item_index: int, update_data: dict):
                 cart["items"][item_index][key] = value
         cart["updatedAt"] = datetime.utcnow()
         await carts_collection.replace_one({"sessionId": session_id}, cart)
+        _forget_cart(session_id)
         return True
     return False
 
@@ -271,50 +307,197 @@ async def remove_from_cart(session_id: str, item_index: int):
         cart["items"].pop(item_index)
         cart["updatedAt"] = datetime.utcnow()
         await carts_collection.replace_one({"sessionId": session_id}, cart)
+        _forget_cart(session_id)
         return True
     return False
 
 async def clear_cart(session_id: str):
     """Clear all items from cart"""
     result = await carts_collection.delete_one({"sessionId": session_id})
+    _forget_cart(session_id)
     return result.deleted_count > 0
 
 # Custom Order operations
 async def create_custom_order(order_data: dict):
     """Create custom order"""
+    order_data["emailLower"] = normalize_email(order_data.get("email"))
     result = await custom_orders_collection.insert_one(order_data)
     return result.inserted_id
 
-async def get_custom_orders():
-    """Get all custom orders"""
-    orders = await custom_orders_collection.find({}).sort("createdAt", -1).to_list(1000)
-    return orders
+async def get_custom_orders(query: Optional[Dict[str, Any]] = None, summary: bool = False,
+                            limit: int = 1000, skip: int = 0):
+    """Get custom orders, optionally filtered and projected to the summary fields"""
+    projection = CUSTOM_ORDER_SUMMARY_PROJECTION if summary else None
+    cursor = custom_orders_collection.find(query or {}, projection).sort("createdAt", -1).skip(skip).limit(limit)
+    orders = await cursor.to_list(limit)
+    return _summary_rows(orders) if summary else orders
 
 async def get_custom_order_by_id(order_id: str):
-    """Get custom order by ID"""
+    """Get custom order by ID, falling back to the archive"""
     order = await custom_orders_collection.find_one({"orderId": order_id})
+    if order is None:
+        order = await custom_orders_archive_collection.find_one({"orderId": order_id})
     return order
 
 async def update_custom_order_status(order_id: str, status: str):
-    """Update custom order status"""
-    result = await custom_orders_collection.update_one(
-        {"orderId": order_id},
-        {"$set": {"status": status, "updatedAt": datetime.utcnow()}}
+    """Update custom order status, returning the order as it was before the change (None if unchanged)
+
+    An archived order whose status changes is moved back to the active collection.
+    """
+    previous = await custom_orders_collection.find_one_and_update(
+        {"orderId": order_id, "status": {"$ne": status}},
+        {"$set": {"status": status, "updatedAt": datetime.utcnow()}},
+        return_document=ReturnDocument.BEFORE
     )
-    return result.modified_count > 0
+    if previous is None:
+        previous = await custom_orders_archive_collection.find_one({"orderId": order_id, "status": {"$ne": status}})
+        if previous is not None:
+            restored = {key: value for key, value in previous.items() if key != "archivedAt"}
+            restored.update(status=status, updatedAt=datetime.utcnow())
+            await custom_orders_collection.replace_one({"_id": previous["_id"]}, restored, upsert=True)
+            await custom_orders_archive_collection.delete_one({"_id": previous["_id"]})
+    return previous
+
+# Fields read and returned by bulk custom order status changes
+BULK_STATUS_PROJECTION = {"_id": 1, "orderId": 1, "status": 1, "createdAt": 1, "totalPrice": 1,
+                          "customerName": 1, "email": 1}
+
+async def find_custom_orders(query: Dict[str, Any], limit: int = 1000):
+    """Get custom orders matching a filter with the fields needed for status changes"""
+    return await custom_orders_collection.find(query, BULK_STATUS_PROJECTION).to_list(limit)
+
+async def update_custom_orders_status(orders: List[Dict[str, Any]], from_statuses: List[str], status: str):
+    """Move each order to a status if it is still in an allowed source status
+
+    Returns the orders as they were before the change, only for the writes that matched.
+    """
+    now = datetime.utcnow()
+
+    async def move(order):
+        return await custom_orders_collection.find_one_and_update(
+            {"_id": order["_id"], "status": {"$in": from_statuses}},
+            {"$set": {"status": status, "updatedAt": now}},
+            projection=BULK_STATUS_PROJECTION,
+            return_document=ReturnDocument.BEFORE
+        )
+
+    previous = await asyncio.gather(*(move(order) for order in orders))
+    return [order for order in previous if order is not None]
+
+# Active and archived order collections, searched in this order by payment and customer lookups
+ORDER_COLLECTIONS = (
+    (orders_collection, "regular_order"),
+    (custom_orders_collection, "custom_order"),
+    (orders_archive_collection, "regular_order"),
+    (custom_orders_archive_collection, "custom_order"),
+)
+
+# Payment operations
+async def update_order_payment(payment_intent_id: str, payment_status: str, status: Optional[str] = None,
+                               from_statuses: Optional[List[str]] = None):
+    """Record a payment outcome on the regular or custom order paid by a payment intent
+
+    Returns (order before the update, order type) or (None, None) if no order matches
+    """
+    update: Dict[str, Any] = {"paymentStatus": payment_status, "updatedAt": datetime.utcnow()}
+    for collection, order_type in ORDER_COLLECTIONS:
+        previous = await collection.find_one_and_update(
+            {"paymentIntentId": payment_intent_id},
+            {"$set": update},
+            return_document=ReturnDocument.BEFORE
+        )
+        if previous:
+            if status and previous.get("status") in (from_statuses or []):
+                await collection.update_one(
+                    {"_id": previous["_id"], "status": previous["status"]},
+                    {"$set": {"status": status}}
+                )
+            return previous, order_type
+    return None, None
 
 # Regular Order operations
 async def create_order(order_data: dict):
     """Create regular order"""
+    order_data["emailLower"] = normalize_email(order_data.get("customerEmail"))
     result = await orders_collection.insert_one(order_data)
     return result.inserted_id
 
-async def get_orders_by_email(email: str):
-    """Get orders by customer email"""
-    orders = await orders_collection.find({"customerEmail": email}).sort("createdAt", -1).to_list(1000)
-    return orders
+def _unique_orders(orders: List[Dict[str, Any]], key) -> List[Dict[str, Any]]:
+    """Drop repeats of an order seen in both its active and archive collection (mid-archive)
+
+    The active collections are read first, so their copy is the one kept.
+    """
+    seen = set()
+    unique = []
+    for order in orders:
+        if key(order) not in seen:
+            seen.add(key(order))
+            unique.append(order)
+    return unique
+
+async def get_orders_by_email(email: str, limit: int = 1000, skip: int = 0):
+    """Get orders by customer email (case-insensitive), including archived orders"""
+    query = {"emailLower": normalize_email(email)}
+    orders = []
+    for collection in (orders_collection, orders_archive_collection):
+        # The requested page can come from either collection; take enough of each to cover it
+        cursor = collection.find(query).sort("createdAt", -1).limit(skip + limit)
+        orders.extend(await cursor.to_list(skip + limit))
+    orders = _unique_orders(orders, key=lambda order: order["_id"])
+    orders.sort(key=lambda order: order["createdAt"], reverse=True)
+    return orders[skip:skip + limit]
+
+# Fields returned in a customer's combined order history
+HISTORY_PROJECTIONS = {
+    "regular_order": {"_id": 1, "orderId": 1, "status": 1, "totalAmount": 1, "items.quantity": 1, "createdAt": 1},
+    "custom_order": {"_id": 1, "orderId": 1, "status": 1, "totalPrice": 1, "quantity": 1, "shirtStyle": 1, "createdAt": 1}
+}
+
+def parse_order_key(value: str):
+    """Order _id from a page cursor (ObjectIds travel as hex strings)"""
+    return ObjectId(value) if ObjectId.is_valid(value) else value
+
+def _history_key(order: Dict[str, Any]):
+    return order["createdAt"], str(order["_id"])
+
+async def get_customer_order_history(email: str, limit: int = 20, before: Optional[datetime] = None,
+                                     before_id: Optional[Any] = None):
+    """Get a page of regular and custom orders for a customer, newest first, including archived orders
+
+    Pages are keyed on (createdAt, _id), so orders sharing a timestamp at a page boundary are not
+    skipped; pass the last order's createdAt and _id as before/before_id for the next page.
+    """
+    query: Dict[str, Any] = {"emailLower": normalize_email(email)}
+    if before and before_id is not None:
+        query["$or"] = [{"createdAt": {"$lt": before}}, {"createdAt": before, "_id": {"$lt": before_id}}]
+    elif before:
+        query["createdAt"] = {"$lt": before}
+
+    history = []
+    for collection, order_type in ORDER_COLLECTIONS:
+        cursor = collection.find(query, HISTORY_PROJECTIONS[order_type]).sort(
+            [("createdAt", -1), ("_id", -1)]).limit(limit + 1)
+        async for order in cursor:
+            order["type"] = order_type
+            history.append(order)
+
+    # Each collection contributed up to limit + 1 rows; keep the newest page across all of them
+    history = _unique_orders(history, key=lambda order: (order["type"], order["_id"]))
+    history.sort(key=_history_key, reverse=True)
+    has_more = len(history) > limit
+    return history[:limit], has_more
+
+async def iter_collection(collection, query: Optional[Dict[str, Any]] = None,
+                          projection: Optional[Dict[str, Any]] = None, batch_size: int = 500):
+    """Yield documents from a cursor in createdAt order without materializing the result set"""
+    cursor = collection.find(query or {}, projection).sort("createdAt", 1).batch_size(batch_size)
+    async for document in cursor:
+        yield document
 
-async def get_all_orders():
-    """Get all orders"""
-    orders = await orders_collection.find({}).sort("createdAt", -1).to_list(1000)
-    return orders
\ No newline at end of file
+async def get_all_orders(query: Optional[Dict[str, Any]] = None, summary: bool = False,
+                         limit: int = 1000, skip: int = 0):
+    """Get orders, optionally filtered and projected to the summary fields"""
+    projection = ORDER_SUMMARY_PROJECTION if summary else None
+    cursor = orders_collection.find(query or {}, projection).sort("createdAt", -1).skip(skip).limit(limit)
+    orders = await cursor.to_list(limit)
+    return _summary_rows(orders) if summary else orders
\ No newline at end of file
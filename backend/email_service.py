@@ -1,21 +1,31 @@
 import os
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
+import asyncio
 import logging
-from jinja2 import Template
+from functools import lru_cache
+
+import metrics
 
 logger = logging.getLogger(__name__)
 
-# Email configuration
-SMTP_SERVER = "smtp.gmail.com"
-SMTP_PORT = 587
+# Email configuration (defaults to Gmail; override SMTP_* to point at another relay or a local sink)
+DEFAULT_SMTP_SERVER = "smtp.gmail.com"
+SMTP_SERVER = os.environ.get('SMTP_HOST', DEFAULT_SMTP_SERVER)
+SMTP_PORT = int(os.environ.get('SMTP_PORT', '587'))
+SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS', 'true').lower() in ('1', 'true', 'yes')
 FROM_EMAIL = "thornedmagnoliaco@gmail.com"
-FROM_PASSWORD = os.environ.get('GMAIL_APP_PASSWORD', '')  # You'll set this
+SMTP_USERNAME = os.environ.get('SMTP_USERNAME', FROM_EMAIL)
+FROM_PASSWORD = os.environ.get('SMTP_PASSWORD', os.environ.get('GMAIL_APP_PASSWORD', ''))  # You'll set this
 BUSINESS_EMAIL = "thornedmagnoliaco@gmail.com"
 
+# Gmail needs the app password; a custom relay may accept unauthenticated mail
+SMTP_ENABLED = bool(FROM_PASSWORD) or SMTP_SERVER != DEFAULT_SMTP_SERVER
+
+# Business notification digest: batch new-order emails to BUSINESS_EMAIL into one summary
+# sent after DIGEST_MAX_LATENCY seconds or once DIGEST_MAX_ORDERS orders are waiting
+DIGEST_ENABLED = os.environ.get('BUSINESS_DIGEST_ENABLED', '').lower() in ('1', 'true', 'yes')
+DIGEST_MAX_LATENCY = float(os.environ.get('BUSINESS_DIGEST_MAX_LATENCY', '300'))
+DIGEST_MAX_ORDERS = int(os.environ.get('BUSINESS_DIGEST_MAX_ORDERS', '25'))
+
 # Email templates
 CUSTOMER_ORDER_TEMPLATE = """
 <!DOCTYPE html>
@@ -112,7 +122,7 @@ BUSINESS_NOTIFICATION_TEMPLATE = """
             <p><strong>Phone:</strong> {{ customer_phone }}</p>
             {% endif %}
             <p><strong>Order Date:</strong> {{ order_date }}</p>
-            <p><strong>Payment Status:</strong> ✅ PAID (${{ total_amount }})</p>
+            <p><strong>Payment Status:</strong> {% if payment_status == 'paid' %}✅ PAID{% else %}⏳ {{ payment_status|upper }}{% endif %} (${{ total_amount }})</p>
             
             {% if order_type == 'custom_order' %}
             <h4>Custom Order Details:</h4>
@@ -153,27 +163,165 @@ BUSINESS_NOTIFICATION_TEMPLATE = """
 </html>
 """
 
+CUSTOMER_STATUS_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body { font-family: 'Arial', sans-serif; line-height: 1.6; color: #2C2C2C; }
+        .header { background: #C4B5A0; color: #FAF9F7; padding: 20px; text-align: center; }
+        .content { padding: 20px; }
+        .order-details { background: #F5F3F0; padding: 15px; border-radius: 8px; margin: 20px 0; }
+        .footer { background: #2C2C2C; color: #FAF9F7; padding: 20px; text-align: center; }
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>Order Update</h1>
+        <p>Thorned Magnolia Collective</p>
+    </div>
+    
+    <div class="content">
+        <p>Dear {{ customer_name }},</p>
+        
+        <div class="order-details">
+            <p><strong>Order #:</strong> {{ order_id }}</p>
+            <p><strong>Status:</strong> {{ status_label }}</p>
+        </div>
+        
+        <p>If you have any questions, reply to this email or call us!</p>
+        
+        <p>With love from Mississippi,<br>
+        <strong>The Thorned Magnolia Collective Team</strong></p>
+    </div>
+    
+    <div class="footer">
+        <p>Thorned Magnolia Collective | Located in Mississippi | Made with Love</p>
+        <p>thornedmagnoliaco@gmail.com</p>
+    </div>
+</body>
+</html>
+"""
+
+BUSINESS_DIGEST_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+        .header { background: #C4B5A0; color: white; padding: 20px; text-align: center; }
+        .content { padding: 20px; }
+        .order-details { background: #f9f9f9; padding: 15px; border-radius: 5px; margin: 15px 0; }
+        .urgent { color: #6B4E37; font-weight: bold; }
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>🎉 {{ orders|length }} New Order(s) Received!</h1>
+    </div>
+    
+    <div class="content">
+        <p class="urgent">Total: ${{ total_amount }} across {{ orders|length }} order(s)</p>
+        
+        {% for order in orders %}
+        <div class="order-details">
+            <h3>Order #{{ order.order_id }} - ${{ order.total_amount }}</h3>
+            <p><strong>Customer:</strong> {{ order.customer_name }} ({{ order.customer_email }})</p>
+            {% if order.customer_phone %}
+            <p><strong>Phone:</strong> {{ order.customer_phone }}</p>
+            {% endif %}
+            <p><strong>Order Date:</strong> {{ order.order_date }}</p>
+            {% if order.order_type == 'custom_order' %}
+            <p><strong>Custom:</strong> {{ order.shirt_style }} in {{ order.shirt_color }}, size {{ order.size }}, {{ order.print_location }} x{{ order.quantity }}</p>
+            {% if order.design_text %}
+            <p><strong>Text Design:</strong> "{{ order.design_text }}"{% if order.selected_font %} ({{ order.selected_font }}){% endif %}</p>
+            {% endif %}
+            {% if order.design_image %}
+            <p><strong>Design Image:</strong> Uploaded (check server files)</p>
+            {% endif %}
+            {% if order.special_instructions %}
+            <p><strong>Special Instructions:</strong> {{ order.special_instructions }}</p>
+            {% endif %}
+            {% else %}
+            <ul>
+            {% for item in order['items'] %}
+                <li>{{ item.product_name }} - {{ item.selected_color }}/{{ item.selected_size }} ({{ item.print_location }}) x{{ item.quantity }} = ${{ item.total_price }}</li>
+            {% endfor %}
+            </ul>
+            {% endif %}
+        </div>
+        {% endfor %}
+    </div>
+</body>
+</html>
+"""
+
+STATUS_LABELS = {
+    "pending": "Received",
+    "confirmed": "Confirmed",
+    "in-progress": "In Production",
+    "completed": "Completed",
+    "cancelled": "Cancelled"
+}
+
+# Templates are compiled once, on first render, and shared across sends.
+# jinja2 and the MIME/SMTP modules are imported lazily to keep the API's cold start light.
+@lru_cache(maxsize=None)
+def template_env():
+    """Shared Jinja2 environment holding every email template"""
+    from jinja2 import Environment, DictLoader, select_autoescape
+    return Environment(
+        loader=DictLoader({
+            'customer_order.html': CUSTOMER_ORDER_TEMPLATE,
+            'business_notification.html': BUSINESS_NOTIFICATION_TEMPLATE,
+            'customer_status.html': CUSTOMER_STATUS_TEMPLATE,
+            'business_digest.html': BUSINESS_DIGEST_TEMPLATE
+        }),
+        autoescape=select_autoescape(['html']),
+        auto_reload=False
+    )
+
+@lru_cache(maxsize=None)
+def get_template(name):
+    """Compiled template by name, compiled on first use"""
+    return template_env().get_template(name)
+
+def build_message(to_email, subject, html_content, from_name="Thorned Magnolia Collective"):
+    """Build an HTML email message"""
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = f"{from_name} <{FROM_EMAIL}>"
+    msg['To'] = to_email
+    msg.attach(MIMEText(html_content, 'html'))
+    return msg
+
+def _send_messages(messages):
+    """Send several messages over a single SMTP session"""
+    import smtplib
+
+    with metrics.timed_call(metrics.smtp_send_duration):
+        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
+            if SMTP_STARTTLS:
+                server.starttls()
+            if FROM_PASSWORD:
+                server.login(SMTP_USERNAME, FROM_PASSWORD)
+            for msg in messages:
+                server.send_message(msg)
+
 async def send_email(to_email, subject, html_content, from_name="Thorned Magnolia Collective"):
-    """Send email using Gmail SMTP"""
+    """Send email over SMTP"""
     try:
-        if not FROM_PASSWORD:
+        if not SMTP_ENABLED:
             logger.warning("Gmail app password not set. Emails won't be sent.")
             return False
             
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = f"{from_name} <{FROM_EMAIL}>"
-        msg['To'] = to_email
-
-        # Add HTML content
-        html_part = MIMEText(html_content, 'html')
-        msg.attach(html_part)
+        msg = build_message(to_email, subject, html_content, from_name)
 
-        # Send email
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(FROM_EMAIL, FROM_PASSWORD)
-            server.send_message(msg)
+        # Send email off the event loop; smtplib blocks for the whole SMTP exchange
+        await asyncio.to_thread(_send_messages, [msg])
             
         logger.info(f"Email sent successfully to {to_email}")
         return True
@@ -182,37 +330,69 @@ async def send_email(to_email, subject, html_content, from_name="Thorned Magnoli
         logger.error(f"Failed to send email to {to_email}: {e}")
         return False
 
+def order_template_vars(order_data, default_customer_name='Valued Customer'):
+    """Template variables shared by the customer and business order emails"""
+    template_vars = {
+        'customer_name': order_data.get('customerName', order_data.get('customer_name', default_customer_name)),
+        'customer_email': order_data.get('email', order_data.get('customerEmail', '')),
+        'customer_phone': order_data.get('phone', ''),
+        'order_id': order_data.get('orderId', order_data.get('order_id', 'TMC-ORDER')),
+        'order_date': order_data.get('createdAt', order_data.get('order_date', 'Today')),
+        'order_type': order_data.get('type', 'regular_order'),
+        'total_amount': order_data.get('totalPrice', order_data.get('totalAmount', order_data.get('total_amount', 0))),
+        'payment_status': order_data.get('paymentStatus', 'pending'),
+    }
+
+    # Add specific fields based on order type
+    if order_data.get('type') == 'custom_order':
+        template_vars.update({
+            'shirt_style': order_data.get('shirtStyle', 'T-Shirt'),
+            'shirt_color': order_data.get('shirtColor', 'Not specified'),
+            'size': order_data.get('size', 'Not specified'),
+            'size_extra_cost': 0,  # Could calculate this
+            'print_location': order_data.get('printLocation', 'front').replace('both', 'Front & Back'),
+            'quantity': order_data.get('quantity', 1),
+            'design_text': order_data.get('designText', ''),
+            'selected_font': order_data.get('selectedFont', ''),
+            'design_image': order_data.get('designImage', ''),
+            'special_instructions': order_data.get('specialInstructions', '')
+        })
+    else:
+        items = order_data.get('items', [])
+        template_vars['items_count'] = len(items)
+        template_vars['items'] = [
+            {
+                'product_name': item.get('productName', ''),
+                'selected_color': item.get('selectedColor', ''),
+                'selected_size': item.get('selectedSize', ''),
+                'print_location': item.get('printLocation', ''),
+                'quantity': item.get('quantity', 1),
+                'total_price': item.get('totalPrice', 0)
+            }
+            for item in items
+        ]
+
+    return template_vars
+
+def render_order_confirmation(order_data):
+    """Render the customer confirmation email, returning (subject, html)"""
+    template_vars = order_template_vars(order_data)
+    subject = f"Order Confirmation - {template_vars['order_id']}"
+    return subject, get_template('customer_order.html').render(**template_vars)
+
+def render_business_notification(order_data):
+    """Render the business notification email, returning (subject, html)"""
+    template_vars = order_template_vars(order_data, 'Unknown Customer')
+    if not template_vars['customer_email']:
+        template_vars['customer_email'] = 'Not provided'
+    subject = f"🎉 New Order: {template_vars['order_id']} - ${template_vars['total_amount']}"
+    return subject, get_template('business_notification.html').render(**template_vars)
+
 async def send_order_confirmation(order_data):
     """Send order confirmation to customer"""
     try:
-        template = Template(CUSTOMER_ORDER_TEMPLATE)
-        
-        # Prepare template variables
-        template_vars = {
-            'customer_name': order_data.get('customerName', order_data.get('customer_name', 'Valued Customer')),
-            'order_id': order_data.get('orderId', order_data.get('order_id', 'TMC-ORDER')),
-            'order_date': order_data.get('createdAt', order_data.get('order_date', 'Today')),
-            'order_type': order_data.get('type', 'regular_order'),
-            'total_amount': order_data.get('totalPrice', order_data.get('total_amount', 0)),
-        }
-        
-        # Add specific fields based on order type
-        if order_data.get('type') == 'custom_order':
-            template_vars.update({
-                'shirt_style': order_data.get('shirtStyle', 'T-Shirt'),
-                'shirt_color': order_data.get('shirtColor', 'Not specified'),
-                'size': order_data.get('size', 'Not specified'),
-                'print_location': order_data.get('printLocation', 'front').replace('both', 'Front & Back'),
-                'quantity': order_data.get('quantity', 1),
-                'special_instructions': order_data.get('specialInstructions', '')
-            })
-        else:
-            template_vars['items_count'] = len(order_data.get('items', []))
-        
-        html_content = template.render(**template_vars)
-        
+        subject, html_content = render_order_confirmation(order_data)
         customer_email = order_data.get('email', order_data.get('customerEmail', ''))
-        subject = f"Order Confirmation - {template_vars['order_id']}"
         
         return await send_email(customer_email, subject, html_content)
         
@@ -223,39 +403,7 @@ async def send_order_confirmation(order_data):
 async def send_business_notification(order_data):
     """Send order notification to business email"""
     try:
-        template = Template(BUSINESS_NOTIFICATION_TEMPLATE)
-        
-        # Prepare template variables
-        template_vars = {
-            'order_id': order_data.get('orderId', order_data.get('order_id', 'TMC-ORDER')),
-            'customer_name': order_data.get('customerName', order_data.get('customer_name', 'Unknown Customer')),
-            'customer_email': order_data.get('email', order_data.get('customerEmail', 'Not provided')),
-            'customer_phone': order_data.get('phone', ''),
-            'order_date': order_data.get('createdAt', order_data.get('order_date', 'Today')),
-            'order_type': order_data.get('type', 'regular_order'),
-            'total_amount': order_data.get('totalPrice', order_data.get('total_amount', 0)),
-        }
-        
-        # Add specific fields based on order type
-        if order_data.get('type') == 'custom_order':
-            template_vars.update({
-                'shirt_style': order_data.get('shirtStyle', 'T-Shirt'),
-                'shirt_color': order_data.get('shirtColor', 'Not specified'),
-                'size': order_data.get('size', 'Not specified'),
-                'size_extra_cost': 0,  # Could calculate this
-                'print_location': order_data.get('printLocation', 'front').replace('both', 'Front & Back'),
-                'quantity': order_data.get('quantity', 1),
-                'design_text': order_data.get('designText', ''),
-                'selected_font': order_data.get('selectedFont', ''),
-                'design_image': order_data.get('designImage', ''),
-                'special_instructions': order_data.get('specialInstructions', '')
-            })
-        else:
-            template_vars['items'] = order_data.get('items', [])
-        
-        html_content = template.render(**template_vars)
-        
-        subject = f"🎉 New Order: {template_vars['order_id']} - ${template_vars['total_amount']}"
+        subject, html_content = render_business_notification(order_data)
         
         return await send_email(BUSINESS_EMAIL, subject, html_content, "Order System")
         
@@ -263,12 +411,64 @@ async def send_business_notification(order_data):
         logger.error(f"Error sending business notification: {e}")
         return False
 
+# Pending business notifications waiting for the next digest
+_digest_orders = []
+_digest_timer = None
+
+def pending_digest_count():
+    """Number of business notifications waiting for the next digest"""
+    return len(_digest_orders)
+
+def render_business_digest(orders):
+    """Render the digest email for a list of order template variables, returning (subject, html)"""
+    total_amount = sum(float(order.get('total_amount') or 0) for order in orders)
+    subject = f"🎉 {len(orders)} New Order(s) - ${total_amount:g}"
+    return subject, get_template('business_digest.html').render(orders=orders, total_amount=f"{total_amount:g}")
+
+async def queue_business_notification(order_data):
+    """Add an order to the business digest, flushing once the count threshold is reached"""
+    global _digest_timer
+    template_vars = order_template_vars(order_data, 'Unknown Customer')
+    if not template_vars['customer_email']:
+        template_vars['customer_email'] = 'Not provided'
+    _digest_orders.append(template_vars)
+
+    if len(_digest_orders) >= DIGEST_MAX_ORDERS:
+        return await flush_business_digest()
+    if _digest_timer is None or _digest_timer.done():
+        _digest_timer = asyncio.get_running_loop().create_task(_flush_digest_after(DIGEST_MAX_LATENCY))
+    return True
+
+async def _flush_digest_after(delay):
+    await asyncio.sleep(delay)
+    await flush_business_digest()
+
+async def flush_business_digest():
+    """Send every pending business notification as one summary email"""
+    global _digest_orders, _digest_timer
+    if _digest_timer is not None and _digest_timer is not asyncio.current_task():
+        _digest_timer.cancel()
+    _digest_timer = None
+
+    orders, _digest_orders = _digest_orders, []
+    if not orders:
+        return True
+    try:
+        subject, html_content = render_business_digest(orders)
+        return await send_email(BUSINESS_EMAIL, subject, html_content, "Order System")
+    except Exception as e:
+        logger.error(f"Error sending business digest for {len(orders)} order(s): {e}")
+        return False
+
 async def send_order_emails(order_data):
     """Send both customer confirmation and business notification"""
     try:
         # Send both emails concurrently
-        customer_result = await send_order_confirmation(order_data)
-        business_result = await send_business_notification(order_data)
+        business_send = queue_business_notification if DIGEST_ENABLED else send_business_notification
+        customer_result, business_result = await asyncio.gather(
+            send_order_confirmation(order_data),
+            business_send(order_data)
+        )
         
         return {
             'customer_email_sent': customer_result,
@@ -279,4 +479,35 @@ async def send_order_emails(order_data):
         return {
             'customer_email_sent': False,
             'business_email_sent': False
-        }
\ No newline at end of file
+        }
+
+async def send_status_update_emails(orders, status):
+    """Notify customers of a status change for a batch of orders over one SMTP session"""
+    try:
+        if not SMTP_ENABLED:
+            logger.warning("Gmail app password not set. Emails won't be sent.")
+            return 0
+
+        template = get_template('customer_status.html')
+        status_label = STATUS_LABELS.get(status, status)
+        messages = []
+        for order in orders:
+            customer_email = order.get('email', order.get('customerEmail', ''))
+            if not customer_email:
+                continue
+            html_content = template.render(
+                customer_name=order.get('customerName', 'Valued Customer'),
+                order_id=order.get('orderId'),
+                status_label=status_label
+            )
+            subject = f"Order Update - {order.get('orderId')}: {status_label}"
+            messages.append(build_message(customer_email, subject, html_content))
+
+        if messages:
+            await asyncio.to_thread(_send_messages, messages)
+            logger.info(f"Sent {len(messages)} status update email(s)")
+        return len(messages)
+
+    except Exception as e:
+        logger.error(f"Error sending status update emails: {e}")
+        return 0
@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List
+
+# Columns written for each export, in order
+ORDER_EXPORT_FIELDS = [
+    "orderId", "createdAt", "customerEmail", "status", "itemCount",
+    "subtotal", "tax", "shipping", "totalAmount"
+]
+CUSTOM_ORDER_EXPORT_FIELDS = [
+    "orderId", "createdAt", "customerName", "email", "phone", "shirtStyle", "shirtColor",
+    "size", "printLocation", "quantity", "totalPrice", "status"
+]
+
+# Rows buffered per chunk written to the response
+ROWS_PER_CHUNK = 200
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "msgpack": "application/msgpack",
+}
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def _export_row(document: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    row = {}
+    for field in fields:
+        if field == "itemCount":
+            row[field] = sum(item.get("quantity", 0) for item in document.get("items", []))
+        else:
+            value = document.get(field)
+            row[field] = value.isoformat() if isinstance(value, datetime) else value
+    return row
+
+async def stream_csv(documents: AsyncIterator[Dict[str, Any]], fields: List[str]) -> AsyncIterator[str]:
+    """Render documents as CSV, yielding one chunk per ROWS_PER_CHUNK rows"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    rows = 0
+    async for document in documents:
+        writer.writerow(_export_row(document, fields))
+        rows += 1
+        if rows % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+async def stream_ndjson(documents: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Render full documents as newline-delimited JSON"""
+    lines = []
+    async for document in documents:
+        document.pop("_id", None)
+        lines.append(json.dumps(document, default=_json_default))
+        if len(lines) >= ROWS_PER_CHUNK:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+async def stream_msgpack(documents: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Render full documents as a stream of concatenated MessagePack maps (read with msgpack.Unpacker)"""
+    import msgpack
+    packer = msgpack.Packer(default=_json_default, use_bin_type=True)
+    chunk = []
+    async for document in documents:
+        document.pop("_id", None)
+        chunk.append(packer.pack(document))
+        if len(chunk) >= ROWS_PER_CHUNK:
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        yield b"".join(chunk)
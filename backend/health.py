@@ -0,0 +1,103 @@
+"""Liveness and readiness probes, cached so frequent health checks never add database load"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import NetworkTimeout, ServerSelectionTimeoutError
+
+from database import client, mongo_url
+from monitoring import pool_stats
+import email_service
+import stripe_webhooks
+
+# Probe results are reused for this long
+PROBE_CACHE_SECONDS = 2.0
+
+# Mongo must answer a ping within this long to count as ready
+MONGO_PING_TIMEOUT = 1.0
+
+# Readiness fails once this share of the connection pool is checked out
+POOL_SATURATION_LIMIT = 0.9
+
+_last_probe: Optional[Dict[str, Any]] = None
+_last_probe_at = 0.0
+_probe_lock: Optional[asyncio.Lock] = None
+_ping_client: Optional[AsyncIOMotorClient] = None
+
+def _ping_database():
+    """Dedicated one-connection client whose driver timeouts match MONGO_PING_TIMEOUT
+
+    Cancelling an await on the shared client would leave its executor thread blocked in server
+    selection (30s by default), so probes against a down Mongo would pile up threads.
+    """
+    global _ping_client
+    if _ping_client is None:
+        timeout_ms = int(MONGO_PING_TIMEOUT * 1000)
+        _ping_client = AsyncIOMotorClient(mongo_url, maxPoolSize=1, serverSelectionTimeoutMS=timeout_ms,
+                                          connectTimeoutMS=timeout_ms, socketTimeoutMS=timeout_ms)
+    return _ping_client.admin
+
+def close():
+    """Close the probe's Mongo client"""
+    global _ping_client
+    if _ping_client is not None:
+        _ping_client.close()
+        _ping_client = None
+
+async def _ping_mongo() -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        await _ping_database().command("ping")
+        return {"ok": True, "latencyMs": round((time.perf_counter() - start) * 1000, 2)}
+    except (ServerSelectionTimeoutError, NetworkTimeout):
+        return {"ok": False, "latencyMs": None, "error": f"ping timed out after {MONGO_PING_TIMEOUT}s"}
+    except Exception as e:
+        return {"ok": False, "latencyMs": None, "error": str(e)}
+
+def _pool() -> Dict[str, Any]:
+    max_pool_size = client.options.pool_options.max_pool_size or 0
+    utilization = pool_stats.checked_out / max_pool_size if max_pool_size else 0.0
+    return {
+        "checkedOut": pool_stats.checked_out,
+        "openConnections": pool_stats.open_connections,
+        "maxPoolSize": max_pool_size,
+        "utilization": round(utilization, 3),
+        "checkoutFailures": pool_stats.checkout_failures,
+    }
+
+async def _probe() -> Dict[str, Any]:
+    mongo = await _ping_mongo()
+    pool = _pool()
+    ready = mongo["ok"] and pool["utilization"] < POOL_SATURATION_LIMIT
+    return {
+        "status": "ready" if ready else "unavailable",
+        "mongo": mongo,
+        "pool": pool,
+        "queues": {
+            "stripeEvents": stripe_webhooks.queue_depth(),
+            "businessDigest": email_service.pending_digest_count(),
+        },
+        "checkedAt": datetime.utcnow(),
+    }
+
+async def readiness() -> Dict[str, Any]:
+    """Latest readiness probe, refreshed at most once per PROBE_CACHE_SECONDS"""
+    global _last_probe, _last_probe_at, _probe_lock
+    if _last_probe is not None and time.monotonic() - _last_probe_at < PROBE_CACHE_SECONDS:
+        return {**_last_probe, "cached": True}
+    if _probe_lock is None:
+        _probe_lock = asyncio.Lock()
+    async with _probe_lock:
+        # Concurrent checks wait for the probe already in flight instead of starting another
+        if _last_probe is None or time.monotonic() - _last_probe_at >= PROBE_CACHE_SECONDS:
+            _last_probe = await _probe()
+            _last_probe_at = time.monotonic()
+            return {**_last_probe, "cached": False}
+    return {**_last_probe, "cached": True}
+
+def liveness() -> Dict[str, Any]:
+    """The process is up and serving requests"""
+    return {"status": "alive", "checkedAt": datetime.utcnow()}
@@ -0,0 +1,226 @@
+"""Per-variant (product x color x size) stock with atomic reservations during checkout
+
+Each tracked variant is one document in `inventory` holding `available` (sellable now) and
+`reserved` (held by open checkouts) counts. Stock only moves through conditional `$inc` updates
+guarded by `available >= quantity`, so concurrent checkouts cannot oversell a variant. Variants
+without a document are untracked and never limit sales.
+"""
+
+import logging
+import os
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ASCENDING, UpdateOne
+
+from database import inventory_collection, inventory_reservations_collection, forget_inflight
+from catalog_cache import invalidate_products
+
+logger = logging.getLogger(__name__)
+
+# How long checkout holds stock before an unpaid reservation is released
+RESERVATION_TTL = timedelta(minutes=int(os.environ.get("INVENTORY_RESERVATION_MINUTES", "15")))
+
+# Expired reservations are swept at most this often, piggybacking on new reservations
+SWEEP_INTERVAL_SECONDS = 30
+
+_last_sweep = 0.0
+
+class OutOfStock(Exception):
+    """Raised when a variant does not have enough available stock"""
+
+    def __init__(self, variants: List[Dict[str, Any]]):
+        self.variants = variants
+        super().__init__(", ".join(f"{v['productId']} {v['color']}/{v['size']}" for v in variants))
+
+def variant_id(product_id: str, color: str, size: str) -> str:
+    """Inventory document id for a variant"""
+    return f"{product_id}|{color}|{size}"
+
+def _variant_quantities(items: Iterable[Dict[str, Any]]) -> Dict[Tuple[str, str, str], int]:
+    """Sum cart or order item quantities per variant"""
+    quantities: Dict[Tuple[str, str, str], int] = defaultdict(int)
+    for item in items:
+        key = (item["productId"], item.get("selectedColor", ""), item.get("selectedSize", ""))
+        quantities[key] += int(item.get("quantity", 1) or 0)
+    return quantities
+
+async def ensure_inventory_indexes():
+    await inventory_collection.create_index([("productId", ASCENDING)])
+    await inventory_reservations_collection.create_index([("status", ASCENDING), ("expiresAt", ASCENDING)])
+    await inventory_reservations_collection.create_index([("paymentIntentId", ASCENDING)], sparse=True)
+    await inventory_reservations_collection.create_index([("sessionKey", ASCENDING), ("status", ASCENDING)])
+
+def _stock_changed():
+    """Product reads include `available`, so cached and in-flight ones must not outlive a stock change"""
+    forget_inflight("products", "product", "products_by_category")
+    invalidate_products()
+
+async def _take(items: Iterable[Dict[str, Any]], hold: bool) -> List[Dict[str, Any]]:
+    """Atomically decrement every tracked variant, rolling back on any shortage
+
+    With hold=True the units move to `reserved`; otherwise they leave stock entirely. Returns the
+    tracked lines taken, as stored on a reservation.
+    """
+    taken: List[Dict[str, Any]] = []
+    shortages: List[Dict[str, Any]] = []
+    for (product_id, color, size), quantity in _variant_quantities(items).items():
+        if quantity <= 0:
+            continue
+        line = {"variantId": variant_id(product_id, color, size), "productId": product_id,
+                "color": color, "size": size, "quantity": quantity}
+        increments = {"available": -quantity, "reserved": quantity} if hold else {"available": -quantity}
+        result = await inventory_collection.update_one(
+            {"_id": line["variantId"], "available": {"$gte": quantity}},
+            {"$inc": increments, "$set": {"updatedAt": datetime.utcnow()}}
+        )
+        if result.matched_count:
+            taken.append(line)
+        elif await inventory_collection.count_documents({"_id": line["variantId"]}, limit=1):
+            shortages.append(line)
+
+    if shortages:
+        await _return(taken, held=hold)
+        raise OutOfStock(shortages)
+    if taken:
+        _stock_changed()
+    return taken
+
+async def _return(lines: Iterable[Dict[str, Any]], held: bool):
+    """Put units back into available stock"""
+    operations = [
+        UpdateOne(
+            {"_id": line["variantId"]},
+            {"$inc": {"available": line["quantity"], "reserved": -line["quantity"]} if held
+             else {"available": line["quantity"]},
+             "$set": {"updatedAt": datetime.utcnow()}}
+        )
+        for line in lines
+    ]
+    if operations:
+        await inventory_collection.bulk_write(operations, ordered=False)
+        _stock_changed()
+
+async def reserve_stock(session_key: Optional[str], items: List[Dict[str, Any]]) -> Optional[str]:
+    """Hold stock for a checkout; replaces the session's previous hold. Returns the reservation id"""
+    await _maybe_sweep()
+    if session_key:
+        await release_reservation({"sessionKey": session_key})
+
+    lines = await _take(items, hold=True)
+    if not lines:
+        return None
+    reservation_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    await inventory_reservations_collection.insert_one({
+        "_id": reservation_id,
+        "sessionKey": session_key,
+        "items": lines,
+        "status": "held",
+        "createdAt": now,
+        "expiresAt": now + RESERVATION_TTL,
+    })
+    return reservation_id
+
+async def attach_payment_intent(reservation_id: Optional[str], payment_intent_id: str):
+    """Link a reservation to the payment intent that will pay for it"""
+    if reservation_id:
+        await inventory_reservations_collection.update_one(
+            {"_id": reservation_id}, {"$set": {"paymentIntentId": payment_intent_id}}
+        )
+
+async def release_reservation(query: Dict[str, Any]) -> bool:
+    """Return a held reservation's units to stock; each reservation is released at most once"""
+    reservation = await inventory_reservations_collection.find_one_and_update(
+        {**query, "status": "held"},
+        {"$set": {"status": "released", "releasedAt": datetime.utcnow()}}
+    )
+    if reservation is None:
+        return False
+    await _return(reservation["items"], held=True)
+    return True
+
+async def commit_order_stock(payment_intent_id: Optional[str], items: List[Dict[str, Any]]):
+    """Turn the checkout's hold into a sale, or take the stock directly when nothing is held
+
+    Each payment intent's stock is committed once, so a retried order does not take it again.
+    Raises OutOfStock when there is no hold and a tracked variant is short.
+    """
+    if payment_intent_id:
+        reservation = await inventory_reservations_collection.find_one_and_update(
+            {"paymentIntentId": payment_intent_id, "status": "held"},
+            {"$set": {"status": "committed", "committedAt": datetime.utcnow()}}
+        )
+        if reservation is not None:
+            # Only `reserved` moves; the units already left `available` when they were held
+            operations = [
+                UpdateOne({"_id": line["variantId"]},
+                          {"$inc": {"reserved": -line["quantity"]}, "$set": {"updatedAt": datetime.utcnow()}})
+                for line in reservation["items"]
+            ]
+            await inventory_collection.bulk_write(operations, ordered=False)
+            return
+        # No hold left: record the sale as committed before taking stock, unless a retry already did
+        now = datetime.utcnow()
+        claim = await inventory_reservations_collection.update_one(
+            {"paymentIntentId": payment_intent_id, "status": "committed"},
+            {"$setOnInsert": {"_id": str(uuid.uuid4()), "sessionKey": None, "items": [],
+                              "createdAt": now, "committedAt": now}},
+            upsert=True
+        )
+        if claim.upserted_id is None:
+            return
+        lines = await _take(items, hold=False)
+        await inventory_reservations_collection.update_one({"_id": claim.upserted_id}, {"$set": {"items": lines}})
+        return
+    await _take(items, hold=False)
+
+async def release_expired_reservations() -> int:
+    """Release every held reservation past its expiry"""
+    released = 0
+    async for reservation in inventory_reservations_collection.find(
+        {"status": "held", "expiresAt": {"$lt": datetime.utcnow()}}, {"_id": 1}
+    ):
+        if await release_reservation({"_id": reservation["_id"]}):
+            released += 1
+    if released:
+        logger.info(f"Released {released} expired stock reservation(s)")
+    return released
+
+async def _maybe_sweep():
+    global _last_sweep
+    now = time.monotonic()
+    if now - _last_sweep >= SWEEP_INTERVAL_SECONDS:
+        _last_sweep = now
+        try:
+            await release_expired_reservations()
+        except Exception as e:
+            logger.error(f"Failed to release expired stock reservations: {e}")
+
+async def get_stock(product_id: str) -> List[Dict[str, Any]]:
+    """All tracked variants of a product"""
+    return await inventory_collection.find(
+        {"productId": product_id}, {"_id": 0, "color": 1, "size": 1, "available": 1, "reserved": 1}
+    ).sort([("color", 1), ("size", 1)]).to_list(None)
+
+async def set_stock(product_id: str, variants: List[Dict[str, Any]]):
+    """Set the available count of each given variant, creating untracked ones"""
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {"_id": variant_id(product_id, variant["color"], variant["size"])},
+            {
+                "$set": {"productId": product_id, "color": variant["color"], "size": variant["size"],
+                         "available": variant["available"], "updatedAt": now},
+                "$setOnInsert": {"reserved": 0}
+            },
+            upsert=True
+        )
+        for variant in variants
+    ]
+    if operations:
+        await inventory_collection.bulk_write(operations, ordered=False)
+    _stock_changed()
@@ -0,0 +1,127 @@
+"""In-process metrics rendered in the Prometheus text format
+
+Updates are plain attribute/list increments with no locks: they are cheap enough to run on every
+request and Mongo command, at the cost of rare lost increments under heavy thread contention.
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in list(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value}")
+        return lines
+
+class Gauge(Counter):
+    def dec(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def set(self, *labels: str, value: float):
+        self.values[labels] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series.setdefault(labels, [0] * (len(self.buckets) + 2))
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in list(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.label_names, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+# HTTP
+http_requests_total = Counter("http_requests_total", "HTTP requests handled", ["method", "route", "status"])
+http_request_duration = Histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route"])
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being handled")
+
+# MongoDB
+mongo_command_duration = Histogram("mongodb_command_duration_seconds", "MongoDB command latency",
+                                   ["collection", "command"])
+mongo_command_failures = Counter("mongodb_command_failures_total", "Failed MongoDB commands",
+                                 ["collection", "command"])
+
+# Outbound services
+smtp_send_duration = Histogram("smtp_send_duration_seconds", "SMTP session latency (connect through quit)",
+                               ["result"])
+stripe_request_duration = Histogram("stripe_request_duration_seconds", "Stripe API call latency",
+                                    ["operation", "result"])
+
+# Request coalescing: coalesced / (leader + coalesced) is the share of reads that skipped Mongo
+singleflight_calls = Counter("singleflight_calls_total", "Single-flight reads by resource and role",
+                             ["resource", "role"])
+
+# Admission control
+admission_rejections = Counter("admission_rejections_total", "Requests shed by admission control",
+                               ["route_class", "reason"])
+
+REGISTRY = [
+    http_requests_total, http_request_duration, http_requests_in_flight,
+    mongo_command_duration, mongo_command_failures,
+    smtp_send_duration, stripe_request_duration,
+    singleflight_calls, admission_rejections,
+]
+
+def render_metrics() -> str:
+    """All registered metrics in the Prometheus text exposition format"""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+@contextmanager
+def timed_call(histogram: Histogram, *labels: str):
+    """Time a block, labelling the observation with its result ('ok' or 'error')"""
+    start = time.perf_counter()
+    result = "ok"
+    try:
+        yield
+    except Exception:
+        result = "error"
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - start, *labels, result)
@@ -0,0 +1,534 @@
+"""ASGI middleware for the API"""
+
+import gzip
+import hmac
+import json
+import logging
+import math
+import os
+import random
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qs
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+class MetricsMiddleware:
+    """Count requests and time them per route template (e.g. /api/products/{product_id})"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.http_requests_in_flight.dec()
+            # The router stores the matched route on the scope; unmatched paths share one label
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or ("/uploads" if scope["path"].startswith("/uploads") else "unmatched")
+            method = scope["method"]
+            metrics.http_request_duration.observe(elapsed, method, route_label)
+            metrics.http_requests_total.inc(method, route_label, str(status))
+
+
+class ProfilingMiddleware:
+    """Profile individual requests with pyinstrument, on demand or for a random sample
+
+    A request carrying the admin token (X-Profile header or ?profile= query parameter) gets the
+    profile back instead of its normal response, as HTML or speedscope JSON (X-Profile-Format or
+    ?profile_format=). Sampled requests respond normally and their profile is written to
+    PROFILES_DIR, keeping only the newest max_profiles files. The middleware is only installed when
+    PROFILING_TOKEN or PROFILING_SAMPLE_RATE is set, so it costs nothing otherwise.
+    """
+
+    def __init__(self, app, token: str = "", sample_rate: float = 0.0, profiles_dir: str = "/tmp/profiles",
+                 interval: float = 0.001, max_profiles: int = 100):
+        self.app = app
+        self.token = token.encode()
+        self.sample_rate = sample_rate
+        self.profiles_dir = Path(profiles_dir)
+        self.interval = interval
+        self.max_profiles = max_profiles
+
+    def _requested_format(self, scope):
+        """Profile format if this request asked for a profile with a valid token, else None"""
+        # Header and query values are untrusted bytes; compare them as bytes and never decode them
+        headers = dict(scope.get("headers") or [])
+        token = headers.get(b"x-profile", b"")
+        output = headers.get(b"x-profile-format", b"")
+        if not token and b"profile=" in scope.get("query_string", b""):
+            # latin-1 maps every byte to one character and back, so this cannot fail
+            query = parse_qs(scope["query_string"].decode("latin-1"), encoding="latin-1")
+            token = query.get("profile", [""])[0].encode("latin-1")
+            output = output or query.get("profile_format", [""])[0].encode("latin-1")
+        if self.token and token and hmac.compare_digest(token, self.token):
+            return "speedscope" if output == b"speedscope" else "html"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        output = self._requested_format(scope)
+        sampled = output is None and self.sample_rate > 0 and random.random() < self.sample_rate
+        if output is None and not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning("pyinstrument is not installed; skipping request profiling")
+            await self.app(scope, receive, send)
+            return
+
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        if sampled:
+            profiler.start()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                profiler.stop()
+                self._save(profiler, scope)
+            return
+
+        async def discard(message):
+            pass
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.stop()
+
+        if output == "speedscope":
+            from pyinstrument.renderers import SpeedscopeRenderer
+            body = profiler.output(renderer=SpeedscopeRenderer()).encode()
+            content_type = b"application/json"
+        else:
+            body = profiler.output_html().encode()
+            content_type = b"text/html; charset=utf-8"
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    def _save(self, profiler, scope):
+        try:
+            from pyinstrument.renderers import SpeedscopeRenderer
+            self.profiles_dir.mkdir(parents=True, exist_ok=True)
+            route = getattr(scope.get("route"), "path", scope["path"]).strip("/").replace("/", "_") or "root"
+            path = self.profiles_dir / f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{scope['method']}-{route}.speedscope.json"
+            path.write_text(profiler.output(renderer=SpeedscopeRenderer()))
+            self._prune()
+        except Exception as e:
+            logger.error(f"Failed to save request profile: {e}")
+
+    def _prune(self):
+        """Delete the oldest saved profiles beyond max_profiles (names start with their timestamp)"""
+        profiles = sorted(self.profiles_dir.glob("*.speedscope.json"))
+        for path in profiles[:max(len(profiles) - self.max_profiles, 0)]:
+            path.unlink(missing_ok=True)
+
+class _GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return gzip.compress(data, self.level, mtime=0)
+
+    def stream(self):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress, compressor.flush
+
+class _BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality: int):
+        import brotli
+        self.brotli = brotli
+        self.quality = quality
+
+    def compress(self, data: bytes) -> bytes:
+        return self.brotli.compress(data, quality=self.quality)
+
+    def stream(self):
+        compressor = self.brotli.Compressor(quality=self.quality)
+        return compressor.process, compressor.finish
+
+class _ZstdEncoder:
+    name = "zstd"
+
+    def __init__(self, level: int):
+        import zstandard
+        self.compressor = zstandard.ZstdCompressor(level=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def stream(self):
+        compressor = self.compressor.compressobj()
+        return compressor.compress, compressor.flush
+
+def _available_encoders(cached: bool):
+    """Encoders in server preference order; brotli and zstd only when their packages are installed"""
+    # Cached bodies are compressed once, so they can afford higher levels
+    encoders = []
+    for factory, fast, slow in ((_BrotliEncoder, 4, 9), (_ZstdEncoder, 3, 10)):
+        try:
+            encoders.append(factory(slow if cached else fast))
+        except ImportError:
+            pass
+    encoders.append(_GzipEncoder(9 if cached else 6))
+    return encoders
+
+def _accepted_encodings(header: str):
+    """Content codings the client accepts (q > 0), mapped to their q-values"""
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    return {name: q for name, q in accepted.items() if q > 0}
+
+class CompressionMiddleware:
+    """Compress text and JSON responses with brotli, zstd or gzip per the client's Accept-Encoding
+
+    Responses below minimum_size, with a content type outside COMPRESSIBLE_TYPES, or already
+    carrying a Content-Encoding are passed through untouched, as is everything under the excluded
+    paths (uploaded images are already compressed). Streaming responses (exports) are compressed
+    chunk by chunk. Responses with an ETag (the pre-serialized catalog) keep their compressed form
+    in a small LRU so identical bytes are not recompressed per request.
+    """
+
+    COMPRESSIBLE_TYPES = (
+        "application/json", "application/x-ndjson", "application/msgpack", "application/javascript",
+        "application/xml",
+        "image/svg+xml", "text/",
+    )
+
+    def __init__(self, app, minimum_size: int = 1024, exclude_paths=("/uploads",), cache_size: int = 64):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.exclude_paths = tuple(exclude_paths)
+        self.cache_size = cache_size
+        self.encoders = {encoder.name: encoder for encoder in _available_encoders(cached=False)}
+        self.cached_encoders = {encoder.name: encoder for encoder in _available_encoders(cached=True)}
+        # (etag, encoding) -> compressed body
+        self._cache = OrderedDict()
+
+    def _choose(self, scope):
+        headers = dict(scope.get("headers") or [])
+        accepted = _accepted_encodings(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if "*" in accepted:
+            accepted.setdefault("gzip", accepted["*"])
+        best = None
+        for name in self.encoders:
+            if name in accepted and (best is None or accepted[name] > accepted[best]):
+                best = name
+        return best
+
+    def _compressible(self, headers) -> bool:
+        content_type = headers.get(b"content-type", b"").decode("latin-1").lower()
+        return (b"content-encoding" not in headers
+                and any(content_type.startswith(allowed) for allowed in self.COMPRESSIBLE_TYPES))
+
+    def _compress_cached(self, encoding: str, etag: bytes, body: bytes) -> bytes:
+        key = (etag, encoding)
+        compressed = self._cache.get(key)
+        if compressed is None:
+            compressed = self.cached_encoders[encoding].compress(body)
+            self._cache[key] = compressed
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return compressed
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+        encoding = self._choose(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compress = flush = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, compress, flush, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                headers = dict(start.get("headers") or [])
+                length = headers.get(b"content-length")
+                passthrough = (
+                    not self._compressible(headers)
+                    or start["status"] in (204, 206, 304)
+                    or (length is not None and int(length) < self.minimum_size)
+                )
+                if passthrough:
+                    await send(start)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            raw_headers = [(k, v) for k, v in start.get("headers") or [] if k != b"content-length"]
+            headers = dict(raw_headers)
+            # Vary may be repeated; add Accept-Encoding unless some Vary header already names it
+            varies = b",".join(v for k, v in raw_headers if k == b"vary").lower()
+            vary = [] if b"accept-encoding" in varies or b"*" in varies else [(b"vary", b"Accept-Encoding")]
+
+            if compress is None and not more_body:
+                # Whole body in one message
+                if len(body) < self.minimum_size:
+                    await send({**start, "headers": list(start.get("headers") or []) + vary})
+                    await send(message)
+                    return
+                etag = headers.get(b"etag")
+                if etag:
+                    body = self._compress_cached(encoding, etag, body)
+                    # Each encoding of a representation gets its own strong validator
+                    tagged = etag[:-1] + b"-" + encoding.encode() + b'"' if etag.endswith(b'"') else etag
+                    raw_headers = [(k, tagged if k == b"etag" else v) for k, v in raw_headers]
+                else:
+                    body = self.encoders[encoding].compress(body)
+                await send({**start, "headers": raw_headers + vary + [
+                    (b"content-encoding", encoding.encode()),
+                    (b"content-length", str(len(body)).encode()),
+                ]})
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            if compress is None:
+                # Streaming response: compress each chunk as it is produced
+                compress, flush = self.encoders[encoding].stream()
+                await send({**start, "headers": raw_headers + vary + [(b"content-encoding", encoding.encode())]})
+            chunk = compress(body) if body else b""
+            if not more_body:
+                chunk += flush()
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+class _TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+class AdmissionMiddleware:
+    """Shed excess API load with fast 429/503 responses instead of letting every request slow down
+
+    Each /api request is put in a route class (checkout, webhook, upload, cart, or browse for
+    everything else). A class is capped at CONCURRENCY[class] requests in flight. Past
+    `reserved_share` of max_in_flight only checkout and Stripe webhooks are admitted, so placing
+    orders keeps working while browsing is shed. Rejections carry Retry-After.
+
+    With rate_limit on, checkout, upload and cart are also token-bucket rate limited per client IP:
+    the X-Forwarded-For hop appended by the outermost of `trusted_proxies` proxies, else the peer
+    address. An X-Session-Id header only narrows the limit to a session under that IP, which gets
+    IP_RATE_FACTOR times the rate so customers behind one NAT do not throttle each other, while
+    minting session ids cannot lift a client past the per-IP bucket.
+    """
+
+    # (route class, methods, exact paths or path prefix ending in "/"), checked in order
+    ROUTE_CLASSES = (
+        ("checkout", {"POST"}, ("/api/orders", "/api/custom-orders", "/api/create-payment-intent")),
+        ("webhook", {"POST"}, ("/api/stripe/webhook",)),
+        ("upload", {"POST"}, ("/api/upload",)),
+        ("cart", {"POST", "PUT", "DELETE"}, ("/api/cart", "/api/cart/")),
+    )
+    PRIORITY_CLASSES = {"checkout", "webhook"}
+
+    # Requests in flight per route class
+    CONCURRENCY = {"checkout": 32, "webhook": 16, "upload": 8, "cart": 32, "browse": 64}
+
+    # Per-client (tokens per second, burst); classes not listed are not rate limited
+    RATES = {"checkout": (1.0, 5), "upload": (0.5, 5), "cart": (5.0, 20)}
+
+    # An IP whose requests carry X-Session-Id may use this many sessions' worth of RATES
+    IP_RATE_FACTOR = 10
+
+    # Idle buckets are dropped once this many clients are tracked
+    MAX_BUCKETS = 10000
+
+    def __init__(self, app, max_in_flight: int = 100, reserved_share: float = 0.2, rate_limit: bool = False,
+                 trusted_proxies: int = 1):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.rate_limit = rate_limit
+        self.trusted_proxies = trusted_proxies
+        self.shared_limit = int(max_in_flight * (1 - reserved_share))
+        self.in_flight = 0
+        self.class_in_flight = {name: 0 for name in self.CONCURRENCY}
+        self.buckets = {}
+
+    def _route_class(self, method: str, path: str):
+        for name, methods, paths in self.ROUTE_CLASSES:
+            if method in methods and any(path == p or (p.endswith("/") and path.startswith(p)) for p in paths):
+                return name
+        return "browse"
+
+    def _client_ip(self, scope) -> str:
+        """Client address as seen by the outermost trusted proxy; hops left of it are client-supplied"""
+        client = scope.get("client")
+        peer = client[0] if client else "unknown"
+        if not self.trusted_proxies:
+            return peer
+        forwarded = b",".join(v for k, v in scope.get("headers") or [] if k == b"x-forwarded-for")
+        hops = [hop.strip() for hop in forwarded.decode("latin-1").split(",") if hop.strip()]
+        return hops[-self.trusted_proxies] if len(hops) >= self.trusted_proxies else peer
+
+    def _client_buckets(self, scope):
+        """(bucket key, rate multiplier) pairs a request must take a token from"""
+        ip = "ip:" + self._client_ip(scope)
+        session = dict(scope.get("headers") or []).get(b"x-session-id")
+        if not session:
+            return [(ip, 1)]
+        return [(ip, self.IP_RATE_FACTOR), (ip + "|s:" + session.decode("latin-1")[:128], 1)]
+
+    def _take_token(self, route_class: str, clients, now: float) -> float:
+        """0 if a token was taken from every bucket, else seconds until all of them have one"""
+        rate, burst = self.RATES[route_class]
+        buckets = []
+        for client, factor in clients:
+            key = (route_class, client)
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                if len(self.buckets) >= self.MAX_BUCKETS:
+                    self._prune(now)
+                bucket = self.buckets[key] = _TokenBucket(rate * factor, burst * factor, now)
+            else:
+                bucket.refill(now)
+            buckets.append(bucket)
+        wait = max((1 - bucket.tokens) / bucket.rate for bucket in buckets)
+        if wait > 0:
+            return wait
+        for bucket in buckets:
+            bucket.tokens -= 1
+        return 0.0
+
+    def _prune(self, now: float):
+        for key, bucket in list(self.buckets.items()):
+            if bucket.tokens + (now - bucket.updated) * bucket.rate >= bucket.burst:
+                del self.buckets[key]
+
+    async def _reject(self, send, status: int, retry_after: float, detail: str, route_class: str, reason: str):
+        metrics.admission_rejections.inc(route_class, reason)
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or not path.startswith("/api/") or path.startswith("/api/health"):
+            await self.app(scope, receive, send)
+            return
+
+        route_class = self._route_class(scope["method"], path)
+        limit = self.max_in_flight if route_class in self.PRIORITY_CLASSES else self.shared_limit
+        if self.in_flight >= limit:
+            await self._reject(send, 503, 1, "Server busy, please retry", route_class, "saturated")
+            return
+        if self.class_in_flight[route_class] >= self.CONCURRENCY[route_class]:
+            await self._reject(send, 503, 1, "Too many concurrent requests, please retry", route_class, "concurrency")
+            return
+        if self.rate_limit and route_class in self.RATES:
+            wait = self._take_token(route_class, self._client_buckets(scope), time.monotonic())
+            if wait:
+                await self._reject(send, 429, wait, "Too many requests, please slow down", route_class, "rate")
+                return
+
+        self.in_flight += 1
+        self.class_in_flight[route_class] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            self.class_in_flight[route_class] -= 1
+
+def admission_settings():
+    """AdmissionMiddleware options from the environment, or None when admission control is disabled"""
+    if os.environ.get("ADMISSION_CONTROL", "true").lower() in ("0", "false", "no"):
+        return None
+    return {
+        "max_in_flight": int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", "100")),
+        # Off until the storefront sends X-Session-Id; per-IP limits alone throttle shared NATs
+        "rate_limit": os.environ.get("ADMISSION_RATE_LIMIT", "false").lower() in ("1", "true", "yes"),
+        "trusted_proxies": int(os.environ.get("ADMISSION_TRUSTED_PROXIES", "1")),
+    }
+
+def compression_settings():
+    """CompressionMiddleware options from the environment, or None when compression is disabled"""
+    minimum_size = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+    if minimum_size < 0:
+        return None
+    return {"minimum_size": minimum_size}
+
+def profiling_settings():
+    """ProfilingMiddleware options from the environment, or None when profiling is disabled"""
+    token = os.environ.get("PROFILING_TOKEN", "")
+    sample_rate = float(os.environ.get("PROFILING_SAMPLE_RATE", "0") or 0)
+    if not token and sample_rate <= 0:
+        return None
+    return {
+        "token": token,
+        "sample_rate": sample_rate,
+        "profiles_dir": os.environ.get("PROFILES_DIR", "/tmp/profiles"),
+        "max_profiles": int(os.environ.get("PROFILES_MAX", "100")),
+    }
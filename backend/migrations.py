@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""Versioned database migrations: indexes, seed data and backfills applied once per database"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from database import (
+    db, categories_collection, products_collection,
+    ensure_indexes, migrate_normalized_emails
+)
+from inventory import ensure_inventory_indexes
+from archive import ensure_archive_indexes
+from stripe_webhooks import ensure_event_indexes
+
+logger = logging.getLogger(__name__)
+
+migrations_collection = db.schema_migrations
+
+# A lock older than this is assumed to belong to a crashed process
+LOCK_TIMEOUT = timedelta(seconds=60)
+LOCK_WAIT_SECONDS = 30
+
+SEED_CATEGORIES = [
+    {"id": "teachers", "name": "Teachers", "description": "Inspiring designs for educators", "displayOrder": 1},
+    {"id": "mamas", "name": "Mamas", "description": "Celebrating motherhood", "displayOrder": 2},
+    {"id": "seasons", "name": "Seasons", "description": "Seasonal favorites", "displayOrder": 3},
+    {"id": "quotes", "name": "Quotes", "description": "Motivational sayings", "displayOrder": 4},
+    {"id": "graphic", "name": "Graphic", "description": "Bold graphic designs", "displayOrder": 5},
+    {"id": "dads", "name": "Dads", "description": "Dedicated to fathers", "displayOrder": 6},
+    {"id": "embroidery", "name": "Embroidery", "description": "Elegant embroidered pieces", "displayOrder": 7},
+    {"id": "seniors", "name": "Seniors", "description": "Class of 2025 and beyond", "displayOrder": 8},
+    {"id": "holidays", "name": "Holidays", "description": "Festive holiday themes", "displayOrder": 9},
+    {"id": "gamer", "name": "Gamer", "description": "Gaming enthusiasts", "displayOrder": 10},
+    {"id": "worship", "name": "Worship", "description": "Faith-based designs", "displayOrder": 11},
+    {"id": "gameday", "name": "Gameday", "description": "Sports and team spirit", "displayOrder": 12}
+]
+
+SEED_PRODUCTS = [
+    {
+        "id": "1",
+        "name": "World's Best Teacher",
+        "category": "teachers",
+        "price": 20,
+        "image": "https://via.placeholder.com/400x400/C4B5A0/2C2C2C?text=Teacher+Shirt",
+        "colors": ["Black", "Grey", "White", "Beige", "Blue", "Red"],
+        "sizes": ["S", "M", "L", "XL", "2XL", "3XL", "4XL"],
+        "type": "tshirt",
+        "inStock": True
+    },
+    {
+        "id": "2", 
+        "name": "Mama Bear",
+        "category": "mamas",
+        "price": 20,
+        "image": "https://via.placeholder.com/400x400/D4C4B0/2C2C2C?text=Mama+Bear",
+        "colors": ["Black", "Grey", "White", "Beige", "Blue", "Red"],
+        "sizes": ["S", "M", "L", "XL", "2XL", "3XL", "4XL"],
+        "type": "tshirt",
+        "inStock": True
+    },
+    {
+        "id": "3",
+        "name": "Fall Vibes",
+        "category": "seasons", 
+        "price": 20,
+        "image": "https://via.placeholder.com/400x400/8B7D6B/FAF9F7?text=Fall+Vibes",
+        "colors": ["Black", "Grey", "White", "Beige", "Blue", "Red"],
+        "sizes": ["S", "M", "L", "XL", "2XL", "3XL", "4XL"],
+        "type": "tshirt",
+        "inStock": True
+    },
+    {
+        "id": "4",
+        "name": "Be Kind",
+        "category": "quotes",
+        "price": 20,
+        "image": "https://via.placeholder.com/400x400/C4B5A0/FAF9F7?text=Be+Kind",
+        "colors": ["Black", "Grey", "White", "Beige", "Blue", "Red"],
+        "sizes": ["S", "M", "L", "XL", "2XL", "3XL", "4XL"],
+        "type": "tshirt",
+        "inStock": True
+    },
+    {
+        "id": "5",
+        "name": "Retro Sunset",
+        "category": "graphic",
+        "price": 20,
+        "image": "https://via.placeholder.com/400x400/6B4E37/FAF9F7?text=Retro+Sunset",
+        "colors": ["Black", "Grey", "White", "Beige", "Blue", "Red"],
+        "sizes": ["S", "M", "L", "XL", "2XL", "3XL", "4XL"],
+        "type": "tshirt",
+        "inStock": True
+    },
+    {
+        "id": "6",
+        "name": "Dad Joke Loading",
+        "category": "dads",
+        "price": 20,
+        "image": "https://via.placeholder.com/400x400/2C2C2C/FAF9F7?text=Dad+Jokes",
+        "colors": ["Black", "Grey", "White", "Beige", "Blue", "Red"],
+        "sizes": ["S", "M", "L", "XL", "2XL", "3XL", "4XL"],
+        "type": "tshirt",
+        "inStock": True
+    },
+    {
+        "id": "7",
+        "name": "Cozy Fall Sweatshirt",
+        "category": "seasons",
+        "price": 25,
+        "image": "https://via.placeholder.com/400x400/C4B5A0/2C2C2C?text=Cozy+Sweatshirt",
+        "colors": ["Black", "Grey", "White", "Beige", "Blue", "Red"],
+        "sizes": ["S", "M", "L", "XL", "2XL", "3XL", "4XL"],
+        "type": "sweatshirt",
+        "inStock": True
+    },
+    {
+        "id": "8",
+        "name": "Mama Life Sweatshirt",
+        "category": "mamas",
+        "price": 25,
+        "image": "https://via.placeholder.com/400x400/D4C4B0/2C2C2C?text=Mama+Life",
+        "colors": ["Black", "Grey", "White", "Beige", "Blue", "Red"],
+        "sizes": ["S", "M", "L", "XL", "2XL", "3XL", "4XL"],
+        "type": "sweatshirt",
+        "inStock": True
+    }
+]
+
+async def seed_categories():
+    """Insert the default categories into an empty collection; an existing catalog is left as is"""
+    if await categories_collection.count_documents({}, limit=1):
+        return
+    await categories_collection.bulk_write(
+        [UpdateOne({"id": category["id"]}, {"$setOnInsert": category}, upsert=True) for category in SEED_CATEGORIES],
+        ordered=False
+    )
+
+async def seed_products():
+    """Insert the sample products into an empty collection; deleted samples are not brought back"""
+    if await products_collection.count_documents({}, limit=1):
+        return
+    now = datetime.utcnow()
+    await products_collection.bulk_write(
+        [
+            UpdateOne({"id": product["id"]}, {"$setOnInsert": {**product, "createdAt": now, "updatedAt": now}}, upsert=True)
+            for product in SEED_PRODUCTS
+        ],
+        ordered=False
+    )
+
+# Ordered list of (version, name, migration); append new entries, never edit applied ones
+MIGRATIONS = [
+    (1, "create_indexes", ensure_indexes),
+    (2, "seed_categories", seed_categories),
+    (3, "seed_products", seed_products),
+    (4, "normalize_order_emails", migrate_normalized_emails),
+    (5, "create_inventory_indexes", ensure_inventory_indexes),
+    (6, "create_archive_indexes", ensure_archive_indexes),
+    (7, "create_stripe_event_indexes", ensure_event_indexes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+async def current_version() -> int:
+    state = await migrations_collection.find_one({"_id": "state"}, {"version": 1})
+    return state["version"] if state else 0
+
+async def _acquire_lock(owner: str) -> bool:
+    now = datetime.utcnow()
+    try:
+        await migrations_collection.find_one_and_update(
+            {"_id": "lock", "expiresAt": {"$lt": now}},
+            {"$set": {"owner": owner, "expiresAt": now + LOCK_TIMEOUT}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # Another process holds an unexpired lock
+        return False
+
+async def _release_lock(owner: str):
+    await migrations_collection.update_one(
+        {"_id": "lock", "owner": owner},
+        {"$set": {"expiresAt": datetime.min}}
+    )
+
+async def _apply_pending(owner: str):
+    version = await current_version()
+    for number, name, migration in MIGRATIONS:
+        if number <= version:
+            continue
+        started = datetime.utcnow()
+        await migration()
+        await migrations_collection.update_one(
+            {"_id": "state"},
+            {
+                "$set": {"version": number, "updatedAt": datetime.utcnow()},
+                "$push": {"applied": {"version": number, "name": name, "appliedAt": started, "owner": owner}}
+            },
+            upsert=True
+        )
+        # Keep the lock alive between long-running migrations
+        await migrations_collection.update_one(
+            {"_id": "lock", "owner": owner},
+            {"$set": {"expiresAt": datetime.utcnow() + LOCK_TIMEOUT}}
+        )
+        logger.info(f"Applied migration {number}: {name}")
+
+async def run_migrations():
+    """Bring the database to LATEST_VERSION; a database that is already current costs one read"""
+    if await current_version() >= LATEST_VERSION:
+        return
+
+    owner = str(uuid.uuid4())
+    deadline = asyncio.get_running_loop().time() + LOCK_WAIT_SECONDS
+    while not await _acquire_lock(owner):
+        # Another worker is migrating; wait for it to finish (or for its lock to expire)
+        if await current_version() >= LATEST_VERSION:
+            return
+        if asyncio.get_running_loop().time() > deadline:
+            logger.warning("Timed out waiting for the migration lock")
+            return
+        await asyncio.sleep(0.5)
+
+    try:
+        await _apply_pending(owner)
+    finally:
+        await _release_lock(owner)
+
+async def main():
+    await run_migrations()
+    print(f"✅ Database at migration version {await current_version()}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
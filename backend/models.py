@@ -4,6 +4,12 @@ from datetime import datetime
 import uuid
 
 # Product Models
+class VariantStock(BaseModel):
+    color: str
+    size: str
+    available: int
+    reserved: Optional[int] = None
+
 class Product(BaseModel):
     id: Optional[str] = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
@@ -14,6 +20,7 @@ class Product(BaseModel):
     sizes: List[str]
     type: str = "tshirt"  # 'tshirt' or 'sweatshirt'
     inStock: bool = True
+    variants: Optional[List[VariantStock]] = None  # per color/size stock, when tracked
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
 
@@ -36,6 +43,14 @@ class ProductUpdate(BaseModel):
     type: Optional[str] = None
     inStock: Optional[bool] = None
 
+class VariantStockUpdate(BaseModel):
+    color: str
+    size: str
+    available: int = Field(ge=0)
+
+class InventoryUpdate(BaseModel):
+    variants: List[VariantStockUpdate]
+
 # Category Models
 class Category(BaseModel):
     id: str
@@ -97,6 +112,8 @@ class CustomOrder(BaseModel):
     quantity: int = 1
     totalPrice: float
     specialInstructions: Optional[str] = None
+    paymentIntentId: Optional[str] = None
+    paymentStatus: str = "pending"  # 'pending', 'paid', 'failed', 'refunded'
     status: str = "pending"  # 'pending', 'confirmed', 'in-progress', 'completed'
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
@@ -114,11 +131,47 @@ class CustomOrderCreate(BaseModel):
     printLocation: str = "front"
     quantity: int = 1
     specialInstructions: Optional[str] = None
+    paymentIntentId: Optional[str] = None
 
 class CustomOrderUpdate(BaseModel):
     status: Optional[str] = None
     specialInstructions: Optional[str] = None
 
+class CustomOrderFilter(BaseModel):
+    status: Optional[str] = None
+    shirtStyle: Optional[str] = None
+    dateFrom: Optional[datetime] = None
+    dateTo: Optional[datetime] = None
+
+class CustomOrderBulkStatusUpdate(BaseModel):
+    status: str
+    orderIds: Optional[List[str]] = None
+    filter: Optional[CustomOrderFilter] = None
+    notify: bool = True
+
+class BulkStatusResult(BaseModel):
+    orderId: str
+    previousStatus: Optional[str] = None
+    status: Optional[str] = None
+    success: bool
+    detail: Optional[str] = None
+
+class BulkStatusResponse(BaseModel):
+    status: str
+    matched: int
+    updated: int
+    results: List[BulkStatusResult]
+
+class CustomOrderSummary(BaseModel):
+    id: Optional[str] = None
+    orderId: str
+    customerName: str
+    email: str
+    shirtStyle: Optional[str] = None
+    totalPrice: float
+    status: str
+    createdAt: datetime
+
 # Regular Order Models  
 class OrderItem(BaseModel):
     productId: str
@@ -148,11 +201,22 @@ class Order(BaseModel):
     tax: Optional[float] = 0
     shipping: Optional[float] = 0
     totalAmount: float
+    paymentIntentId: Optional[str] = None
+    paymentStatus: str = "pending"  # 'pending', 'paid', 'failed', 'refunded'
     status: str = "pending"  # 'pending', 'confirmed', 'shipped', 'delivered'
     shippingAddress: Optional[ShippingAddress] = None
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
 
+class OrderSummary(BaseModel):
+    id: Optional[str] = None
+    orderId: str
+    customerEmail: str
+    totalAmount: float
+    status: str
+    type: Optional[str] = None
+    createdAt: datetime
+
 class OrderCreate(BaseModel):
     customerEmail: str
     items: List[OrderItem]
@@ -161,6 +225,23 @@ class OrderCreate(BaseModel):
     shipping: Optional[float] = 0
     totalAmount: float
     shippingAddress: Optional[ShippingAddress] = None
+    paymentIntentId: Optional[str] = None
+
+# Customer Order History Models
+class CustomerOrderHistoryEntry(BaseModel):
+    orderId: str
+    type: str  # 'regular_order' or 'custom_order'
+    status: str
+    total: float
+    quantity: int
+    shirtStyle: Optional[str] = None
+    createdAt: datetime
+
+class CustomerOrderHistory(BaseModel):
+    email: str
+    orders: List[CustomerOrderHistoryEntry]
+    nextBefore: Optional[datetime] = None  # pass as ?before= (with ?beforeId=) to fetch the next page
+    nextBeforeId: Optional[str] = None
 
 # Font Models
 class Font(BaseModel):
@@ -0,0 +1,116 @@
+"""pymongo monitoring listeners feeding the health and metrics endpoints and the slow-query log"""
+
+import logging
+import os
+
+from pymongo import monitoring
+
+import metrics
+
+slow_query_logger = logging.getLogger("slow_queries")
+
+# Commands slower than this are logged with their collection and filter shape
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "100"))
+
+# Where each command keeps the filter that decides which documents it touches
+FILTER_FIELDS = {
+    "find": "filter", "count": "query", "distinct": "query", "findAndModify": "query",
+}
+
+def query_shape(value):
+    """Replace literal values in a filter with their type names, keeping operators and field names"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [query_shape(value[0])] if value else []
+    return type(value).__name__
+
+def command_shape(command_name, command):
+    """Filter shape of a command, for logging"""
+    if command_name in FILTER_FIELDS:
+        return query_shape(command.get(FILTER_FIELDS[command_name], {}))
+    if command_name in ("update", "delete"):
+        statements = command.get(command_name + "s") or [{}]
+        return query_shape(statements[0].get("q", {}))
+    if command_name == "aggregate":
+        return [{stage: query_shape(spec) if stage == "$match" else "..." for stage, spec in step.items()}
+                for step in command.get("pipeline", [])]
+    return None
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Track connection pool usage across all servers the client talks to"""
+
+    def __init__(self):
+        self.checked_out = 0
+        self.open_connections = 0
+        self.checkout_failures = 0
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+    def connection_created(self, event):
+        self.open_connections += 1
+
+    def connection_closed(self, event):
+        self.open_connections -= 1
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+class CommandTimings(monitoring.CommandListener):
+    """Record per-collection, per-command durations and log commands slower than SLOW_QUERY_MS"""
+
+    def __init__(self, slow_query_ms: float = SLOW_QUERY_MS):
+        self.slow_query_micros = slow_query_ms * 1000
+        # (connection, request id) -> (collection, command), filled on start and consumed on completion
+        self._inflight = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else ""
+        self._inflight[(event.connection_id, event.request_id)] = (collection, event.command)
+
+    def _finish(self, event):
+        collection, command = self._inflight.pop((event.connection_id, event.request_id), ("", None))
+        metrics.mongo_command_duration.observe(event.duration_micros / 1e6, collection, event.command_name)
+        if command is not None and event.duration_micros >= self.slow_query_micros:
+            # Shapes are only computed for slow commands, keeping the fast path to a dict pop
+            slow_query_logger.warning(
+                f"Slow Mongo {event.command_name} on {collection or '-'} took "
+                f"{event.duration_micros / 1000:.1f}ms; filter shape: {command_shape(event.command_name, command)}"
+            )
+        return collection
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        collection = self._finish(event)
+        metrics.mongo_command_failures.inc(collection, event.command_name)
+
+pool_stats = PoolStats()
+command_timings = CommandTimings()
+
+# Passed to the Mongo client as event_listeners
+EVENT_LISTENERS = [pool_stats, command_timings]
@@ -0,0 +1,125 @@
+"""Registry of open Stripe payment intents so repeat checkout views reuse one intent per session"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from database import payment_intents_collection
+from stripe_client import get_stripe
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Open intents older than this are not reused
+REUSE_WINDOW = timedelta(hours=24)
+
+# Intent states in which the customer has not paid yet and Stripe still allows the amount to change
+MODIFIABLE_STATUSES = {"requires_payment_method", "requires_confirmation", "requires_action"}
+
+def cart_fingerprint(amount: int, currency: str, order_data: Dict[str, Any]) -> str:
+    """Stable hash of what is being paid for"""
+    canonical = json.dumps({"amount": amount, "currency": currency, "order": order_data},
+                           sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def _metadata(order_data: Dict[str, Any], customer_info: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        'order_type': order_data.get('type', 'regular_order'),
+        'customer_name': customer_info.get('name', ''),
+        'customer_email': customer_info.get('email', ''),
+        'customer_phone': customer_info.get('phone', ''),
+    }
+
+async def _create_intent(session_key: Optional[str], fingerprint: str, amount: int, currency: str,
+                         order_data: Dict[str, Any], customer_info: Dict[str, Any]):
+    params = dict(
+        amount=amount,
+        currency=currency,
+        metadata=_metadata(order_data, customer_info),
+        receipt_email=customer_info.get('email'),
+        automatic_payment_methods={
+            'enabled': True,
+        },
+    )
+    if session_key:
+        # Concurrent requests for the same session and cart collapse to one intent on Stripe's side
+        params["idempotency_key"] = f"pi-{session_key}-{fingerprint}"
+    with metrics.timed_call(metrics.stripe_request_duration, "payment_intent.create"):
+        return await asyncio.to_thread(get_stripe().PaymentIntent.create, **params)
+
+async def get_or_create_payment_intent(session_key: Optional[str], amount: int, currency: str,
+                                       order_data: Dict[str, Any], customer_info: Dict[str, Any]):
+    """Return (client_secret, payment_intent_id), reusing the session's open intent when possible"""
+    fingerprint = cart_fingerprint(amount, currency, order_data)
+    if not session_key:
+        intent = await _create_intent(None, fingerprint, amount, currency, order_data, customer_info)
+        return intent.client_secret, intent.id
+
+    entry = await payment_intents_collection.find_one({"sessionKey": session_key})
+    reusable = (
+        entry is not None
+        and entry["status"] == "open"
+        and entry["currency"] == currency
+        and entry["updatedAt"] >= datetime.utcnow() - REUSE_WINDOW
+    )
+
+    intent = None
+    if reusable:
+        stripe = get_stripe()
+        try:
+            if entry["cartFingerprint"] == fingerprint:
+                # The registry can miss a payment (webhooks off, order already placed): ask Stripe first
+                with metrics.timed_call(metrics.stripe_request_duration, "payment_intent.retrieve"):
+                    intent = await asyncio.to_thread(stripe.PaymentIntent.retrieve, entry["paymentIntentId"])
+                if intent.status in MODIFIABLE_STATUSES:
+                    return intent.client_secret, intent.id
+                intent = None
+            else:
+                # Same session, changed cart: move the open intent to the new amount
+                with metrics.timed_call(metrics.stripe_request_duration, "payment_intent.modify"):
+                    intent = await asyncio.to_thread(
+                        stripe.PaymentIntent.modify, entry["paymentIntentId"],
+                        amount=amount, metadata=_metadata(order_data, customer_info),
+                        receipt_email=customer_info.get('email') or None
+                    )
+                if intent.status not in MODIFIABLE_STATUSES:
+                    intent = None
+        except stripe.error.StripeError as e:
+            logger.info(f"Could not reuse payment intent {entry['paymentIntentId']}: {e}")
+            intent = None
+
+    if intent is None:
+        # Key on the intent being replaced too, so a session that already paid gets a fresh intent
+        previous_id = entry["paymentIntentId"] if entry else "new"
+        intent = await _create_intent(f"{session_key}-{previous_id}", fingerprint, amount, currency,
+                                      order_data, customer_info)
+
+    now = datetime.utcnow()
+    await payment_intents_collection.update_one(
+        {"sessionKey": session_key},
+        {
+            "$set": {
+                "paymentIntentId": intent.id,
+                "clientSecret": intent.client_secret,
+                "amount": amount,
+                "currency": currency,
+                "cartFingerprint": fingerprint,
+                "status": "open",
+                "updatedAt": now
+            },
+            "$setOnInsert": {"createdAt": now}
+        },
+        upsert=True
+    )
+    return intent.client_secret, intent.id
+
+async def close_payment_intent(payment_intent_id: Optional[str], status: str):
+    """Stop reusing an intent once it has been paid, cancelled or used to place an order"""
+    if payment_intent_id:
+        await payment_intents_collection.update_one(
+            {"paymentIntentId": payment_intent_id},
+            {"$set": {"status": status, "updatedAt": datetime.utcnow()}}
+        )
@@ -17,6 +17,9 @@ async def reset_database():
         # Clear existing collections
         await db.products.drop()
         await db.categories.drop()
+        await db.schema_migrations.drop()
+        await db.inventory.drop()
+        await db.inventory_reservations.drop()
         print("✅ Cleared existing data")
         
         # Reinitialize with new data
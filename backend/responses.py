@@ -0,0 +1,126 @@
+"""Response encodings: fast JSON by default, MessagePack for clients that ask for it"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.requests import Request
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt; stdlib json keeps the API working
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - without msgpack every client gets JSON
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+def json_default(value: Any):
+    """Encode the types Mongo documents and endpoints hand back that JSON has no native form for"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON with orjson, falling back to the stdlib encoder"""
+    if orjson is not None:
+        return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; datetimes, ObjectIds and Pydantic models are encoded directly"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class MsgPackResponse(Response):
+    """MessagePack body with the same shape as the JSON response (datetimes as ISO strings)"""
+
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=json_default, use_bin_type=True)
+
+def prefers_msgpack(accept: str) -> bool:
+    """True when the Accept header ranks MessagePack at least as high as JSON"""
+    if msgpack is None or "msgpack" not in accept:
+        return False
+    msgpack_q = json_q = 0.0
+    for part in accept.split(","):
+        media_type, _, params = part.partition(";")
+        media_type = media_type.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_type in MSGPACK_MEDIA_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif media_type in ("application/json", "application/*", "*/*"):
+            json_q = max(json_q, q)
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+class MsgPackRequest(Request):
+    """Request whose body is MessagePack; FastAPI reads it through json() like any JSON body"""
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = msgpack.unpackb(await self.body(), raw=False)
+        return self._json
+
+class NegotiatedRoute(APIRoute):
+    """API route that also speaks MessagePack
+
+    Requests with an Accept header preferring application/msgpack get the endpoint's usual
+    response (same response_model validation) encoded as MessagePack, and request bodies sent as
+    application/msgpack are decoded into the same body models. JSON stays the default, and
+    endpoints that return a Response themselves (catalog, streaming exports) are only encoded as
+    JSON. Every response carries Vary: Accept.
+    """
+
+    def get_route_handler(self):
+        json_handler = super().get_route_handler()
+        if msgpack is None:
+            return json_handler
+        response_class = self.response_class
+        self.response_class = MsgPackResponse
+        try:
+            msgpack_handler = super().get_route_handler()
+        finally:
+            self.response_class = response_class
+
+        async def handler(request: Request) -> Response:
+            content_type = request.headers.get("content-type", "").partition(";")[0].strip().lower()
+            if content_type in MSGPACK_MEDIA_TYPES:
+                # FastAPI only parses bodies it sees as JSON; json() on MsgPackRequest unpacks MessagePack
+                headers = [(k, v) for k, v in request.scope["headers"] if k != b"content-type"]
+                headers.append((b"content-type", b"application/json"))
+                request = MsgPackRequest({**request.scope, "headers": headers}, request.receive)
+            if prefers_msgpack(request.headers.get("accept", "")):
+                response = await msgpack_handler(request)
+            else:
+                response = await json_handler(request)
+            # Both encodings share the URL (and the JSON one an ETag), so caches must key on Accept
+            response.headers.append("Vary", "Accept")
+            return response
+
+        return handler
@@ -0,0 +1,21 @@
+"""Lazily imported, configured Stripe SDK (the import is expensive and only payment routes need it)"""
+
+import os
+
+# No fallback: without a key, payment routes report that Stripe is not configured
+STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')
+
+_stripe = None
+
+def payments_configured() -> bool:
+    """Whether a Stripe secret key is set, so payment intents can be created"""
+    return bool(STRIPE_SECRET_KEY)
+
+def get_stripe():
+    """Import and configure the Stripe SDK on first use"""
+    global _stripe
+    if _stripe is None:
+        import stripe
+        stripe.api_key = STRIPE_SECRET_KEY
+        _stripe = stripe
+    return _stripe
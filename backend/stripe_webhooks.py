@@ -0,0 +1,168 @@
+"""Stripe webhook ingestion: events are persisted once, acknowledged, then applied to orders by a worker"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+
+from database import stripe_events_collection, update_order_payment
+from analytics import record_status_change
+from payment_intents import close_payment_intent
+from inventory import release_reservation
+
+logger = logging.getLogger(__name__)
+
+STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET', '')
+
+# Payment outcome for each handled event type: (paymentStatus, new order status, statuses it may move from)
+PAYMENT_EVENTS = {
+    "payment_intent.succeeded": ("paid", "confirmed", ["pending"]),
+    "payment_intent.payment_failed": ("failed", None, None),
+    "payment_intent.canceled": ("failed", None, None),
+    "charge.refunded": ("refunded", None, None),
+}
+
+# Attempts before an event is left in 'failed' for manual review
+MAX_ATTEMPTS = 5
+
+# A 'processing' event claimed longer ago than this is assumed to belong to a crashed worker
+PROCESSING_LEASE = timedelta(minutes=5)
+
+_queue: Optional[asyncio.Queue] = None
+_worker: Optional[asyncio.Task] = None
+
+async def ensure_event_indexes():
+    """Index for reconcile_order_payment's lookup of unmatched events by payment intent"""
+    await stripe_events_collection.create_index([("paymentIntentId", ASCENDING), ("status", ASCENDING)])
+
+def _payment_intent_id(event_type: str, payload: Dict[str, Any]) -> Optional[str]:
+    if event_type.startswith("charge."):
+        return payload.get("payment_intent")
+    return payload.get("id")
+
+async def store_event(event: Dict[str, Any]) -> bool:
+    """Persist a verified event; returns False if Stripe already delivered it"""
+    payload = event.get("data", {}).get("object", {}) or {}
+    document = {
+        "eventId": event["id"],
+        "type": event["type"],
+        "paymentIntentId": _payment_intent_id(event["type"], payload),
+        "payload": payload,
+        "status": "pending" if event["type"] in PAYMENT_EVENTS else "ignored",
+        "attempts": 0,
+        "receivedAt": datetime.utcnow()
+    }
+    try:
+        await stripe_events_collection.insert_one(document)
+    except DuplicateKeyError:
+        return False
+    if document["status"] == "pending":
+        enqueue(event["id"])
+    return True
+
+def enqueue(event_id: str):
+    """Hand an event to the worker without waiting for it to be processed"""
+    if _queue is not None:
+        _queue.put_nowait(event_id)
+
+async def process_event(event_id: str):
+    """Apply one stored event to its order"""
+    event = await stripe_events_collection.find_one_and_update(
+        {"eventId": event_id, "status": {"$in": ["pending", "unmatched"]}},
+        {"$set": {"status": "processing", "claimedAt": datetime.utcnow()}, "$inc": {"attempts": 1}}
+    )
+    if not event:
+        return
+
+    try:
+        payment_status, status, from_statuses = PAYMENT_EVENTS[event["type"]]
+        if event["type"] in ("payment_intent.succeeded", "payment_intent.canceled"):
+            await close_payment_intent(event["paymentIntentId"], payment_status)
+        if event["type"] == "payment_intent.canceled":
+            # Checkout abandoned: put its held stock back
+            await release_reservation({"paymentIntentId": event["paymentIntentId"]})
+        previous, _ = await update_order_payment(event["paymentIntentId"], payment_status, status, from_statuses)
+        if previous is None:
+            # The order may not be placed yet; reconcile_order_payment retries once it is
+            outcome = "unmatched"
+        else:
+            outcome = "processed"
+            if status and previous.get("status") in from_statuses:
+                await record_status_change(previous, status)
+        await stripe_events_collection.update_one(
+            {"eventId": event_id},
+            {"$set": {"status": outcome, "processedAt": datetime.utcnow()}}
+        )
+    except Exception as e:
+        logger.error(f"Failed to process Stripe event {event_id}: {e}")
+        attempts = event.get("attempts", 0) + 1
+        retry = attempts < MAX_ATTEMPTS
+        await stripe_events_collection.update_one(
+            {"eventId": event_id},
+            {"$set": {"status": "pending" if retry else "failed", "error": str(e)}}
+        )
+        if retry:
+            asyncio.get_running_loop().call_later(2 ** attempts, enqueue, event_id)
+
+async def reconcile_order_payment(payment_intent_id: Optional[str]):
+    """Re-apply events that arrived before the order paid by this intent existed"""
+    if not payment_intent_id:
+        return
+    async for event in stripe_events_collection.find(
+        {"paymentIntentId": payment_intent_id, "status": "unmatched"}, {"eventId": 1}
+    ).sort("receivedAt", 1):
+        enqueue(event["eventId"])
+
+async def _run_worker():
+    while True:
+        event_id = await _queue.get()
+        try:
+            await process_event(event_id)
+        except Exception as e:
+            logger.error(f"Stripe webhook worker error on {event_id}: {e}")
+        finally:
+            _queue.task_done()
+
+async def start_worker():
+    """Start the event worker and requeue pending events and those abandoned by a crashed process
+
+    Events another live worker is processing keep their claim until PROCESSING_LEASE runs out.
+    """
+    global _queue, _worker
+    if _worker is not None and not _worker.done():
+        return
+    _queue = asyncio.Queue()
+    _worker = asyncio.get_running_loop().create_task(_run_worker())
+    stale = datetime.utcnow() - PROCESSING_LEASE
+    async for event in stripe_events_collection.find(
+        {"status": {"$in": ["pending", "processing"]}}, {"eventId": 1, "status": 1}
+    ).sort("receivedAt", 1):
+        if event["status"] == "processing":
+            reclaimed = await stripe_events_collection.update_one(
+                {"_id": event["_id"], "status": "processing",
+                 "$or": [{"claimedAt": {"$lt": stale}}, {"claimedAt": {"$exists": False}}]},
+                {"$set": {"status": "pending"}}
+            )
+            if not reclaimed.matched_count:
+                continue
+        enqueue(event["eventId"])
+
+async def stop_worker(timeout: float = 5.0):
+    """Drain queued events (up to timeout seconds) and stop the worker"""
+    global _worker
+    if _worker is None:
+        return
+    try:
+        await asyncio.wait_for(_queue.join(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Stopping Stripe webhook worker with {_queue.qsize()} event(s) still queued")
+    _worker.cancel()
+    _worker = None
+
+def queue_depth() -> int:
+    """Number of events waiting for the worker"""
+    return _queue.qsize() if _queue is not None else 0
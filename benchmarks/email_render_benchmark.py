@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Email template render benchmark for Thorned Magnolia Collective
+Compares renders per second of the precompiled templates against parsing each template per call
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+# Add backend directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from jinja2 import Template
+import email_service
+
+REGULAR_ORDER = {
+    "type": "regular_order",
+    "orderId": "TMC1723000000",
+    "customerEmail": "jane@example.com",
+    "totalAmount": 65.0,
+    "createdAt": datetime(2025, 8, 7, 12, 0, 0),
+    "items": [
+        {"productId": "1", "productName": "World's Best Teacher", "quantity": 2, "selectedColor": "Black",
+         "selectedSize": "M", "printLocation": "front", "unitPrice": 20, "totalPrice": 40},
+        {"productId": "7", "productName": "Cozy Fall Sweatshirt", "quantity": 1, "selectedColor": "Beige",
+         "selectedSize": "L", "printLocation": "both", "unitPrice": 25, "totalPrice": 25},
+    ],
+}
+
+CUSTOM_ORDER = {
+    "type": "custom_order",
+    "orderId": "TMC1723000001",
+    "customerName": "Jane Doe",
+    "email": "jane@example.com",
+    "phone": "555-0100",
+    "shirtStyle": "sweatshirt",
+    "shirtColor": "Grey",
+    "size": "2XL",
+    "printLocation": "both",
+    "quantity": 3,
+    "totalPrice": 96.0,
+    "designText": "Class of 2025",
+    "selectedFont": "script",
+    "specialInstructions": "Gold lettering please",
+    "createdAt": datetime(2025, 8, 7, 12, 0, 0),
+}
+
+def renders_per_second(render, order_data, seconds):
+    """Run render(order_data) repeatedly for about `seconds` and return the rate"""
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(50):
+            render(order_data)
+        count += 50
+    return count / (time.perf_counter() - start)
+
+def render_uncompiled(order_data):
+    """Render both emails the way they were rendered before templates were precompiled"""
+    template_vars = email_service.order_template_vars(order_data)
+    Template(email_service.CUSTOMER_ORDER_TEMPLATE, autoescape=True).render(**template_vars)
+    Template(email_service.BUSINESS_NOTIFICATION_TEMPLATE, autoescape=True).render(**template_vars)
+
+def render_compiled(order_data):
+    """Render both emails with the shared template environment"""
+    email_service.render_order_confirmation(order_data)
+    email_service.render_business_notification(order_data)
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    print(f"Rendering customer + business emails for {seconds:.1f}s per case\n")
+    print(f"{'case':<24}{'uncompiled/s':>14}{'compiled/s':>14}{'speedup':>10}")
+    for name, order_data in (("regular order", REGULAR_ORDER), ("custom order", CUSTOM_ORDER)):
+        before = renders_per_second(render_uncompiled, order_data, seconds)
+        after = renders_per_second(render_compiled, order_data, seconds)
+        print(f"{name:<24}{before:>14,.0f}{after:>14,.0f}{after / before:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
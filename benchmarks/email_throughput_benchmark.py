@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+End-to-end email throughput benchmark for Thorned Magnolia Collective
+Fires N concurrent orders through send_order_emails against a local SMTP sink and reports
+messages per second, per-order latency percentiles and event-loop blocking time
+
+Usage: python benchmarks/email_throughput_benchmark.py [orders] [concurrency] [sink_latency_ms]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+from smtp_sink import SMTPSink
+
+# Start the sink before importing email_service so its SMTP settings point at it
+sink = SMTPSink(latency=float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.0)
+os.environ["SMTP_HOST"] = sink.host
+os.environ["SMTP_PORT"] = str(sink.start())
+os.environ["SMTP_STARTTLS"] = "false"
+os.environ.pop("SMTP_PASSWORD", None)
+os.environ.pop("GMAIL_APP_PASSWORD", None)
+os.environ.pop("BUSINESS_DIGEST_ENABLED", None)
+
+# Add backend directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import logging
+logging.disable(logging.INFO)
+
+import email_service
+
+def make_order(i):
+    """Alternate regular and custom orders"""
+    if i % 2:
+        return {
+            "type": "custom_order", "orderId": f"TMCBENCH{i}", "customerName": "Bench Customer",
+            "email": f"bench{i}@example.com", "shirtStyle": "regular", "shirtColor": "Black", "size": "L",
+            "printLocation": "front", "quantity": 1, "totalPrice": 20.0, "createdAt": datetime.utcnow(),
+        }
+    return {
+        "type": "regular_order", "orderId": f"TMCBENCH{i}", "customerEmail": f"bench{i}@example.com",
+        "totalAmount": 40.0, "createdAt": datetime.utcnow(),
+        "items": [{"productId": "1", "productName": "World's Best Teacher", "quantity": 2, "selectedColor": "Black",
+                   "selectedSize": "M", "printLocation": "front", "unitPrice": 20, "totalPrice": 40}],
+    }
+
+class LoopMonitor:
+    """Measure how long the event loop is blocked by sampling a short sleep"""
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.blocked = 0.0
+        self.max_lag = 0.0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - start - self.interval
+            if lag > self.interval:
+                self.blocked += lag
+            self.max_lag = max(self.max_lag, lag)
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        self._task.cancel()
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+async def run(orders, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async def place(i):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            result = await email_service.send_order_emails(make_order(i))
+            latencies.append(time.perf_counter() - start)
+            if not all(result.values()):
+                failures += 1
+
+    monitor = LoopMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(place(i) for i in range(orders)))
+    elapsed = time.perf_counter() - start
+    monitor.stop()
+    return elapsed, latencies, failures, monitor
+
+def main():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    elapsed, latencies, failures, monitor = asyncio.run(run(orders, concurrency))
+    sink.wait_for(orders * 2, timeout=5)
+    sink.stop()
+
+    print(f"Orders: {orders} (concurrency {concurrency}) -> {sink.messages} messages, {failures} failed orders")
+    print(f"Elapsed: {elapsed:.2f}s, {sink.messages / elapsed:,.1f} messages/s")
+    print(f"Order latency: p50 {percentile(latencies, 50) * 1000:.1f}ms, "
+          f"p95 {percentile(latencies, 95) * 1000:.1f}ms, p99 {percentile(latencies, 99) * 1000:.1f}ms")
+    print(f"Event loop blocked: {monitor.blocked * 1000:.1f}ms total "
+          f"({monitor.blocked / elapsed:.1%} of run), max stall {monitor.max_lag * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Async load test for the Thorned Magnolia Collective API
+Runs a weighted mix of shopper scenarios (browse, add to cart, checkout, custom order with upload)
+from N concurrent virtual users for a fixed duration and reports throughput, p50/p95/p99 latency
+and error rate per request and per scenario. Results are also written as JSON for comparing runs.
+
+Start the API against a local mongod with GMAIL_APP_PASSWORD/SMTP_* unset so no email is sent, e.g.
+    cd backend && MONGO_URL=mongodb://localhost:27017 DB_NAME=loadtest \
+        uvicorn server:app --port 8001
+
+Usage: python benchmarks/load_test.py [--base-url URL] [--concurrency N] [--duration S]
+                                      [--mix browse=70,cart=20,checkout=8,custom=2] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+import httpx
+
+DEFAULT_MIX = "browse=70,cart=20,checkout=8,custom=2"
+
+# Smallest valid PNG, used as the custom order design upload
+PNG_BYTES = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def summarize(latencies, errors, elapsed):
+    """Throughput, latency percentiles (ms) and error rate for one series"""
+    count = len(latencies)
+    if not count:
+        return {"count": 0, "errors": errors, "throughput": 0.0, "errorRate": 0.0}
+    return {
+        "count": count,
+        "errors": errors,
+        "throughput": round(count / elapsed, 2),
+        "errorRate": round(errors / count, 4),
+        "p50": round(percentile(latencies, 50) * 1000, 2),
+        "p95": round(percentile(latencies, 95) * 1000, 2),
+        "p99": round(percentile(latencies, 99) * 1000, 2),
+        "max": round(max(latencies) * 1000, 2),
+    }
+
+class Recorder:
+    """Collects per-request and per-scenario latencies and failures"""
+
+    def __init__(self):
+        self.requests = defaultdict(list)
+        self.request_errors = defaultdict(int)
+        self.scenarios = defaultdict(list)
+        self.scenario_errors = defaultdict(int)
+        self.status_codes = defaultdict(int)
+
+    async def call(self, client, name, method, url, expect=(200,), **kwargs):
+        """Issue one request, recording its latency under name; raises on an unexpected status"""
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.requests[name].append(time.perf_counter() - start)
+            self.request_errors[name] += 1
+            self.status_codes[type(e).__name__] += 1
+            raise
+        self.requests[name].append(time.perf_counter() - start)
+        self.status_codes[str(response.status_code)] += 1
+        if response.status_code not in expect:
+            self.request_errors[name] += 1
+            raise RuntimeError(f"{name} returned {response.status_code}")
+        return response
+
+class VirtualUser:
+    """One shopper with their own cart session"""
+
+    def __init__(self, client, recorder, products):
+        self.client = client
+        self.recorder = recorder
+        self.products = products
+        self.products_by_id = {product["id"]: product for product in products}
+        self.session_id = str(uuid.uuid4())
+        self.email = f"load-{self.session_id[:8]}@example.com"
+
+    async def call(self, name, method, url, **kwargs):
+        # Admission control rate-limits per session, so each virtual user identifies its own
+        headers = {"X-Session-Id": self.session_id}
+        return await self.recorder.call(self.client, name, method, url, headers=headers, **kwargs)
+
+    def pick_product(self):
+        return random.choice(self.products)
+
+    async def browse(self):
+        await self.call("GET /products", "GET", "/products")
+        await self.call("GET /categories", "GET", "/categories")
+        product = self.pick_product()
+        await self.call("GET /products/{id}", "GET", f"/products/{product['id']}")
+        if product.get("category"):
+            await self.call("GET /products/category/{id}", "GET", f"/products/category/{product['category']}")
+
+    async def add_to_cart(self):
+        product = self.pick_product()
+        await self.call("GET /products/{id}", "GET", f"/products/{product['id']}")
+        await self.call("POST /cart", "POST", "/cart", json={
+            "sessionId": self.session_id,
+            "productId": product["id"],
+            "quantity": random.randint(1, 3),
+            "selectedColor": random.choice(product.get("colors") or ["Black"]),
+            "selectedSize": random.choice(product.get("sizes") or ["M"]),
+            "printLocation": "front",
+        })
+        await self.call("GET /cart/{session}", "GET", f"/cart/{self.session_id}")
+
+    async def checkout(self):
+        await self.add_to_cart()
+        cart = (await self.call("GET /cart/{session}", "GET", f"/cart/{self.session_id}")).json() or {}
+        items = []
+        for item in cart.get("items", []):
+            product = self.products_by_id.get(item["productId"], {})
+            items.append({
+                "productId": item["productId"],
+                "productName": product.get("name", ""),
+                "quantity": item["quantity"],
+                "selectedColor": item["selectedColor"],
+                "selectedSize": item["selectedSize"],
+                "printLocation": item.get("printLocation", "front"),
+                "unitPrice": product.get("price", 0),
+                "totalPrice": product.get("price", 0) * item["quantity"],
+            })
+        subtotal = sum(item["totalPrice"] for item in items)
+        await self.call("POST /orders", "POST", "/orders", json={
+            "customerEmail": self.email,
+            "items": items,
+            "subtotal": subtotal,
+            "totalAmount": subtotal,
+        })
+        await self.call("DELETE /cart/{session}", "DELETE", f"/cart/{self.session_id}")
+        self.session_id = str(uuid.uuid4())
+
+    async def custom_order(self):
+        upload = await self.call("POST /upload", "POST", "/upload",
+                                 files={"file": ("design.png", PNG_BYTES, "image/png")})
+        await self.call("POST /custom-orders", "POST", "/custom-orders", json={
+            "customerName": "Load Test",
+            "email": self.email,
+            "designImage": upload.json()["filepath"],
+            "shirtStyle": random.choice(["regular", "vneck", "sweatshirt"]),
+            "shirtColor": "Black",
+            "size": random.choice(["S", "M", "L", "XL", "2XL"]),
+            "printLocation": random.choice(["front", "both"]),
+            "quantity": 1,
+        })
+
+SCENARIOS = {
+    "browse": VirtualUser.browse,
+    "cart": VirtualUser.add_to_cart,
+    "checkout": VirtualUser.checkout,
+    "custom": VirtualUser.custom_order,
+}
+
+def parse_mix(value):
+    """'browse=70,cart=20' -> {'browse': 70.0, 'cart': 20.0}"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+async def run(base_url, concurrency, duration, mix, timeout):
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        products = (await client.get("/products")).json()
+        if not products:
+            raise SystemExit("❌ No products found; run the migrations (python backend/migrations.py) first")
+
+        names, weights = list(mix), list(mix.values())
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            user = VirtualUser(client, recorder, products)
+            while time.perf_counter() < deadline:
+                scenario = random.choices(names, weights)[0]
+                start = time.perf_counter()
+                try:
+                    await SCENARIOS[scenario](user)
+                except (httpx.HTTPError, RuntimeError, ValueError, KeyError):
+                    recorder.scenario_errors[scenario] += 1
+                recorder.scenarios[scenario].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return recorder, elapsed
+
+def report(recorder, elapsed, args):
+    all_latencies = [value for values in recorder.requests.values() for value in values]
+    results = {
+        "startedAt": datetime.utcnow().isoformat() + "Z",
+        "baseUrl": args.base_url,
+        "concurrency": args.concurrency,
+        "duration": round(elapsed, 2),
+        "mix": args.mix,
+        "total": summarize(all_latencies, sum(recorder.request_errors.values()), elapsed),
+        "scenarios": {name: summarize(values, recorder.scenario_errors[name], elapsed)
+                      for name, values in sorted(recorder.scenarios.items())},
+        "requests": {name: summarize(values, recorder.request_errors[name], elapsed)
+                     for name, values in sorted(recorder.requests.items())},
+        "statusCodes": dict(recorder.status_codes),
+    }
+
+    print(f"Load test: {args.concurrency} users for {elapsed:.1f}s against {args.base_url}")
+    print(f"{'':32} {'count':>7} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7}")
+    rows = [("TOTAL", results["total"])]
+    rows += [(f"scenario:{name}", stats) for name, stats in results["scenarios"].items()]
+    rows += list(results["requests"].items())
+    for name, stats in rows:
+        if not stats["count"]:
+            continue
+        print(f"{name:32} {stats['count']:>7} {stats['throughput']:>8.1f} {stats['p50']:>6.1f}ms "
+              f"{stats['p95']:>6.1f}ms {stats['p99']:>6.1f}ms {stats['errorRate']:>7.1%}")
+    print(f"Status codes: {results['statusCodes']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8001/api")
+    parser.add_argument("--concurrency", type=int, default=20, help="virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--timeout", type=float, default=10, help="per-request timeout in seconds")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    recorder, elapsed = asyncio.run(run(args.base_url, args.concurrency, args.duration, args.mix, args.timeout))
+    results = report(recorder, elapsed, args)
+    if not results["total"]["count"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
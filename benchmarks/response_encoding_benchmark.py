@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Response encoding benchmark for GET /api/products and GET /api/orders payloads
+Requests both endpoints through the app (in-process over ASGI, database reads replaced by fixed
+documents) with every route rendering the stdlib JSONResponse (before) and then the app's
+FastJSONResponse (after); that end-to-end number is what the app gains. The breakdown below it
+times the steps FastAPI takes after an endpoint returns (response_model serialization, then
+rendering), and for endpoints without a response_model, the jsonable_encoder walk they still run
+before either renderer.
+
+Usage: python benchmarks/response_encoding_benchmark.py [orders]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+import timeit
+from datetime import datetime, timedelta
+from typing import List
+
+# Add backend directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+# Re-serialize the catalog on every request instead of timing the cached body
+os.environ["CATALOG_CACHE_TTL"] = "0"
+
+import httpx
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from fastapi.utils import create_response_field
+from starlette.routing import request_response
+
+from models import Product, Order
+from migrations import SEED_PRODUCTS
+from responses import FastJSONResponse
+import server
+
+def product_documents():
+    now = datetime(2025, 8, 7, 12, 0, 0)
+    return [{"_id": ObjectId(), **product, "inStock": True, "createdAt": now, "updatedAt": now}
+            for product in SEED_PRODUCTS]
+
+def order_documents(count):
+    start = datetime(2025, 8, 7, 12, 0, 0)
+    return [{
+        "_id": ObjectId(), "id": str(ObjectId()), "orderId": f"TMC{1723000000 + i}",
+        "customerEmail": f"customer{i}@example.com", "emailLower": f"customer{i}@example.com",
+        "items": [
+            {"productId": "1", "productName": "World's Best Teacher", "quantity": 2, "selectedColor": "Black",
+             "selectedSize": "M", "printLocation": "front", "unitPrice": 20, "totalPrice": 40},
+            {"productId": "7", "productName": "Cozy Fall Sweatshirt", "quantity": 1, "selectedColor": "Beige",
+             "selectedSize": "L", "printLocation": "both", "unitPrice": 25, "totalPrice": 25},
+        ],
+        "subtotal": 65.0, "tax": 0, "shipping": 0, "totalAmount": 65.0, "paymentStatus": "paid",
+        "status": "confirmed", "type": "regular_order",
+        "shippingAddress": {"fullName": "Jane Doe", "addressLine1": "1 Magnolia Way", "city": "Jackson",
+                            "state": "MS", "zipCode": "39201", "country": "US"},
+        "createdAt": start - timedelta(minutes=i), "updatedAt": start - timedelta(minutes=i),
+    } for i in range(count)]
+
+def best_ms(func, number):
+    """Best of five runs, in milliseconds per call"""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1000
+
+def compare(name, response_type, documents, number):
+    field = create_response_field(name=f"Response_{name}", type_=response_type, mode="serialization")
+    loop = asyncio.new_event_loop()
+    content = loop.run_until_complete(serialize_response(field=field, response_content=documents))
+
+    def serialize():
+        return loop.run_until_complete(serialize_response(field=field, response_content=documents))
+
+    serialize_ms = best_ms(serialize, number)
+    stdlib_ms = best_ms(lambda: JSONResponse(content), number)
+    fast_ms = best_ms(lambda: FastJSONResponse(content), number)
+    encoder_stdlib_ms = best_ms(
+        lambda: JSONResponse(jsonable_encoder(documents, custom_encoder={ObjectId: str})), number)
+    encoder_fast_ms = best_ms(
+        lambda: FastJSONResponse(jsonable_encoder(documents, custom_encoder={ObjectId: str})), number)
+    loop.close()
+
+    size = len(FastJSONResponse(content).body)
+    print(f"{name}: {len(documents)} documents, {size / 1024:.1f} KiB")
+    print(f"  response_model serialize        {serialize_ms:8.2f}ms")
+    print(f"  render JSONResponse (before)    {stdlib_ms:8.2f}ms  total {serialize_ms + stdlib_ms:.2f}ms")
+    print(f"  render FastJSONResponse (after) {fast_ms:8.2f}ms  total {serialize_ms + fast_ms:.2f}ms "
+          f"({(serialize_ms + stdlib_ms) / (serialize_ms + fast_ms):.1f}x)")
+    print(f"  no response_model: jsonable_encoder + JSONResponse {encoder_stdlib_ms:.2f}ms "
+          f"vs jsonable_encoder + FastJSONResponse {encoder_fast_ms:.2f}ms "
+          f"({encoder_stdlib_ms / encoder_fast_ms:.1f}x)")
+
+def use_response_class(response_class):
+    """Rebuild every API route's handler to render with response_class"""
+    for route in server.app.routes:
+        if isinstance(route, APIRoute):
+            route.response_class = response_class
+            route.app = request_response(route.get_route_handler())
+
+async def request_ms(client, path, number):
+    """Best of five runs, in milliseconds per request"""
+    response = await client.get(path)
+    assert response.status_code == 200, response.text
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(number):
+            await client.get(path)
+        best = min(best, (time.perf_counter() - start) / number * 1000)
+    return best
+
+async def compare_app(products, orders):
+    """GET /api/products and GET /api/orders through the app, before and after"""
+    async def get_all_products():
+        return products
+
+    async def get_all_orders(*args, **kwargs):
+        return orders
+
+    server.get_all_products = get_all_products
+    server.get_all_orders = get_all_orders
+    server.app.dependency_overrides[server.ensure_initialized] = lambda: None
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    # identity keeps CompressionMiddleware out of the timing
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark",
+                                 headers={"Accept-Encoding": "identity"}) as client:
+        for path, number in (("/api/products", 200), ("/api/orders", 10)):
+            use_response_class(JSONResponse)
+            before_ms = await request_ms(client, path, number)
+            use_response_class(FastJSONResponse)
+            after_ms = await request_ms(client, path, number)
+            print(f"GET {path} through the app: JSONResponse {before_ms:.2f}ms vs FastJSONResponse "
+                  f"{after_ms:.2f}ms per request ({before_ms / after_ms:.2f}x)")
+
+def main():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    products = product_documents()
+    order_list = order_documents(orders)
+    asyncio.run(compare_app(products, order_list))
+    print()
+    compare("GET /api/products", List[Product], products, 500)
+    compare("GET /api/orders", List[Order], order_list, 10)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Minimal in-process SMTP sink for benchmarks
+Accepts and counts messages without delivering them; runs on its own thread and event loop
+so it never competes with the event loop being measured
+"""
+
+import asyncio
+import threading
+import time
+
+class SMTPSink:
+    """Plain-text SMTP server that swallows every message it receives"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency  # simulated per-message relay delay in seconds
+        self.messages = 0
+        self.bytes = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    async def _handle(self, reader, writer):
+        writer.write(b"220 sink ESMTP ready\r\n")
+        await writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line[:4].upper()
+            if command in (b"EHLO", b"HELO"):
+                writer.write(b"250-sink\r\n250 8BITMIME\r\n")
+            elif command == b"DATA":
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await writer.drain()
+                size = 0
+                while True:
+                    data = await reader.readline()
+                    if not data or data == b".\r\n":
+                        break
+                    size += len(data)
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                self.messages += 1
+                self.bytes += size
+                writer.write(b"250 OK queued\r\n")
+            elif command == b"QUIT":
+                writer.write(b"221 Bye\r\n")
+                await writer.drain()
+                break
+            else:
+                # MAIL, RCPT, RSET, NOOP
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+        writer.close()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+        self._server.close()
+        self._loop.run_until_complete(self._server.wait_closed())
+        self._loop.close()
+
+    def start(self):
+        """Start serving on a background thread and return the bound port"""
+        self._thread = threading.Thread(target=self._run, name="smtp-sink", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self.port
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def wait_for(self, count, timeout=30.0):
+        """Block until `count` messages have been received"""
+        deadline = time.monotonic() + timeout
+        while self.messages < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.messages >= count
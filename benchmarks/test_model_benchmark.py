@@ -0,0 +1,99 @@
+"""
+Pydantic model microbenchmarks for models.py (pytest-benchmark)
+Times validation, dict dumps and JSON serialization of Product, Order and CustomOrder for a single
+document and for the 1000-document lists the list endpoints return, and model_validate against
+model_construct for trusted database reads. Each model's cases share a benchmark group, so the
+report puts validate and construct side by side.
+
+Save a baseline on the machine that will check for regressions, then compare later runs to it.
+A case fails when its best time doubles against the baseline; best times are the least noisy
+statistic, and the 2x threshold keeps ordinary run-to-run noise from failing the check:
+
+    python -m pytest benchmarks/test_model_benchmark.py --benchmark-save=models
+    python -m pytest benchmarks/test_model_benchmark.py --benchmark-compare --benchmark-compare-fail=min:100%
+"""
+
+import os
+import sys
+from datetime import datetime
+from typing import List
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+# Add backend directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from pydantic import TypeAdapter
+
+from models import Product, Order, CustomOrder
+
+LIST_SIZE = 1000
+
+CREATED_AT = datetime(2025, 8, 7, 12, 0, 0)
+
+PRODUCT = {
+    "id": "1", "name": "World's Best Teacher", "category": "teachers", "price": 20.0,
+    "image": "https://example.com/teacher.jpg", "colors": ["Black", "White", "Grey", "Navy", "Beige"],
+    "sizes": ["S", "M", "L", "XL", "2XL", "3XL"], "type": "tshirt", "inStock": True,
+    "createdAt": CREATED_AT, "updatedAt": CREATED_AT,
+}
+
+ORDER = {
+    "id": "66b3a0f0c2a4e1d2f3a4b5c6", "orderId": "TMC1723000000", "customerEmail": "jane@example.com",
+    "items": [
+        {"productId": "1", "productName": "World's Best Teacher", "quantity": 2, "selectedColor": "Black",
+         "selectedSize": "M", "printLocation": "front", "unitPrice": 20, "totalPrice": 40},
+        {"productId": "7", "productName": "Cozy Fall Sweatshirt", "quantity": 1, "selectedColor": "Beige",
+         "selectedSize": "L", "printLocation": "both", "unitPrice": 25, "totalPrice": 25},
+    ],
+    "subtotal": 65.0, "tax": 0, "shipping": 0, "totalAmount": 65.0, "paymentIntentId": "pi_123",
+    "paymentStatus": "paid", "status": "confirmed",
+    "shippingAddress": {"fullName": "Jane Doe", "addressLine1": "1 Magnolia Way", "city": "Jackson",
+                        "state": "MS", "zipCode": "39201"},
+    "createdAt": CREATED_AT, "updatedAt": CREATED_AT,
+}
+
+CUSTOM_ORDER = {
+    "id": "66b3a0f0c2a4e1d2f3a4b5c7", "orderId": "TMC1723000001", "customerName": "Jane Doe",
+    "email": "jane@example.com", "phone": "555-0100", "designImage": "custom-orders/2025/08/07/design.png",
+    "designText": "Class of 2025", "selectedFont": "script", "shirtStyle": "sweatshirt", "shirtColor": "Grey",
+    "size": "2XL", "printLocation": "both", "quantity": 3, "totalPrice": 96.0,
+    "specialInstructions": "Gold lettering please", "paymentStatus": "pending", "status": "pending",
+    "createdAt": CREATED_AT, "updatedAt": CREATED_AT,
+}
+
+CASES = [(Product, PRODUCT), (Order, ORDER), (CustomOrder, CUSTOM_ORDER)]
+
+OPERATIONS = ["validate", "construct", "dump", "json"]
+
+def operation(model, document, name, size):
+    """The callable timed for one (model, operation, single document or list) case"""
+    if size == "single":
+        instance = model.model_validate(document)
+        return {
+            "validate": lambda: model.model_validate(document),
+            "construct": lambda: model.model_construct(**document),
+            "dump": lambda: instance.model_dump(),
+            "json": lambda: instance.model_dump_json(),
+        }[name]
+
+    documents = [dict(document) for _ in range(LIST_SIZE)]
+    adapter = TypeAdapter(List[model])
+    instances = adapter.validate_python(documents)
+    return {
+        "validate": lambda: adapter.validate_python(documents),
+        # model_construct skips validation but runs in Python, so it is not automatically cheaper
+        "construct": lambda: [model.model_construct(**doc) for doc in documents],
+        "dump": lambda: adapter.dump_python(instances),
+        "json": lambda: adapter.dump_json(instances),
+    }[name]
+
+@pytest.mark.parametrize("size", ["single", "list"])
+@pytest.mark.parametrize("name", OPERATIONS)
+@pytest.mark.parametrize("model,document", CASES, ids=[model.__name__ for model, _ in CASES])
+def test_model_operation(benchmark, model, document, name, size):
+    benchmark.group = f"{model.__name__} ({'1 document' if size == 'single' else f'{LIST_SIZE} documents'})"
+    result = benchmark(operation(model, document, name, size))
+    assert result is not None
@@ -7,6 +7,7 @@ import { Input } from './ui/input';
 import { Label } from './ui/label';
 import { Loader2, CreditCard } from 'lucide-react';
 import { useToast } from '../hooks/use-toast';
+import { getSessionId } from '../services/api';
 
 const stripePromise = loadStripe('pk_live_51RtD5HF4rcLrOAiC86PPkzj83UmojJpzofsoVPaaoG3Ff4nTVZKIIJRoIMxuS3ELSOGP5odien2baIPRQglIDPJR00GG5P6E4P');
 
@@ -179,6 +180,7 @@ const StripeCheckout = ({ amount, orderData, onSuccess, onCancel, title = "Compl
           body: JSON.stringify({
             amount: Math.round(amount * 100), // Convert to cents
             currency: 'usd',
+            sessionId: getSessionId(), // lets the backend reuse this session's open payment intent
             orderData: orderData,
             customerInfo: {
               name: orderData?.customerName || '',
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+# The backend modules import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+# Motor connects lazily; tests swap the collections for in-memory fakes before any query runs.
+# The query plan test does use MONGO_URL, so the database name is always the scratch one it drops.
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ["DB_NAME"] = "thornedmagnolia_test"
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def app():
+    """The FastAPI app with startup work (migrations, webhook worker) skipped"""
+    import server
+    server.app.dependency_overrides[server.ensure_initialized] = lambda: None
+    yield server.app
+    server.app.dependency_overrides.clear()
+
+@pytest.fixture
+async def client(app):
+    import httpx
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        yield client
@@ -0,0 +1,230 @@
+"""In-memory stand-in for the subset of Motor's collection API the backend uses"""
+
+import copy
+import uuid
+from types import SimpleNamespace
+
+from pymongo import DeleteOne, ReplaceOne, ReturnDocument, UpdateOne
+
+def _get(document, path):
+    value = document
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+def _matches_value(value, condition):
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        for operator, operand in condition.items():
+            if operator == "$in" and value not in operand:
+                return False
+            if operator == "$nin" and value in operand:
+                return False
+            if operator == "$ne" and value == operand:
+                return False
+            if operator == "$exists" and (value is not None) != operand:
+                return False
+            if operator in ("$lt", "$lte", "$gt", "$gte"):
+                if value is None:
+                    return False
+                if operator == "$lt" and not value < operand:
+                    return False
+                if operator == "$lte" and not value <= operand:
+                    return False
+                if operator == "$gt" and not value > operand:
+                    return False
+                if operator == "$gte" and not value >= operand:
+                    return False
+        return True
+    return value == condition
+
+def matches(document, query):
+    for key, condition in (query or {}).items():
+        if key == "$or":
+            if not any(matches(document, clause) for clause in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(document, clause) for clause in condition):
+                return False
+        elif not _matches_value(_get(document, key), condition):
+            return False
+    return True
+
+def _project(document, projection):
+    if not projection:
+        return copy.deepcopy(document)
+    included = {key for key, flag in projection.items() if flag and key != "_id"}
+    if included:
+        result = {key: copy.deepcopy(document[key]) for key in included if key in document}
+        if projection.get("_id", 1) and "_id" in document:
+            result["_id"] = document["_id"]
+        return result
+    excluded = {key for key, flag in projection.items() if not flag}
+    return {key: copy.deepcopy(value) for key, value in document.items() if key not in excluded}
+
+def _set_path(document, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        document = document.setdefault(part, {})
+    document[parts[-1]] = value
+
+def _apply(document, update, inserting=False):
+    for path, value in update.get("$set", {}).items():
+        _set_path(document, path, copy.deepcopy(value))
+    if inserting:
+        for path, value in update.get("$setOnInsert", {}).items():
+            _set_path(document, path, copy.deepcopy(value))
+    for path, amount in update.get("$inc", {}).items():
+        _set_path(document, path, (_get(document, path) or 0) + amount)
+    for path, value in update.get("$push", {}).items():
+        current = _get(document, path) or []
+        _set_path(document, path, current + [copy.deepcopy(value)])
+
+def _sort_key(value):
+    # Missing fields sort before any value, as in MongoDB
+    return (value is not None, value)
+
+class FakeCursor:
+    """Sorts and limits on whole documents, then applies the projection, like the server"""
+
+    def __init__(self, documents, projection=None):
+        self.all = documents
+        self.projection = projection
+
+    @property
+    def documents(self):
+        return [_project(document, self.projection) for document in self.all]
+
+    def sort(self, key_or_list, direction=1):
+        keys = [(key_or_list, direction)] if isinstance(key_or_list, str) else list(key_or_list)
+        for key, key_direction in reversed(keys):
+            self.all.sort(key=lambda document: _sort_key(_get(document, key)), reverse=key_direction < 0)
+        return self
+
+    def skip(self, count):
+        self.all = self.all[count:]
+        return self
+
+    def limit(self, count):
+        if count:
+            self.all = self.all[:count]
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    async def to_list(self, length=None):
+        return self.documents[:length] if length else list(self.documents)
+
+    def __aiter__(self):
+        async def iterate():
+            for document in self.documents:
+                yield document
+        return iterate()
+
+class FakeCollection:
+    """Documents keyed by _id; every read returns copies like a real driver would"""
+
+    def __init__(self, documents=()):
+        self.documents = {}
+        for document in documents:
+            document = copy.deepcopy(document)
+            document.setdefault("_id", str(uuid.uuid4()))
+            self.documents[document["_id"]] = document
+
+    def _matching(self, query):
+        return [document for document in self.documents.values() if matches(document, query)]
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([copy.deepcopy(document) for document in self._matching(query)], projection)
+
+    async def find_one(self, query=None, projection=None):
+        found = self._matching(query)
+        return _project(found[0], projection) if found else None
+
+    async def count_documents(self, query, limit=0):
+        count = len(self._matching(query))
+        return min(count, limit) if limit else count
+
+    async def insert_one(self, document):
+        document.setdefault("_id", str(uuid.uuid4()))
+        self.documents[document["_id"]] = copy.deepcopy(document)
+        return SimpleNamespace(inserted_id=document["_id"])
+
+    def _upsert(self, query, update):
+        document = {key: copy.deepcopy(value) for key, value in query.items()
+                    if not key.startswith("$") and not isinstance(value, dict)}
+        document.setdefault("_id", str(uuid.uuid4()))
+        _apply(document, update, inserting=True)
+        self.documents[document["_id"]] = document
+        return document
+
+    async def update_one(self, query, update, upsert=False):
+        found = self._matching(query)
+        if found:
+            _apply(found[0], update)
+            return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            document = self._upsert(query, update)
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=document["_id"])
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def update_many(self, query, update):
+        found = self._matching(query)
+        for document in found:
+            _apply(document, update)
+        return SimpleNamespace(matched_count=len(found), modified_count=len(found))
+
+    async def find_one_and_update(self, query, update, projection=None, upsert=False,
+                                  return_document=ReturnDocument.BEFORE):
+        found = self._matching(query)
+        if not found:
+            if not upsert:
+                return None
+            document = self._upsert(query, update)
+            return _project(document, projection) if return_document == ReturnDocument.AFTER else None
+        before = copy.deepcopy(found[0])
+        _apply(found[0], update)
+        return _project(found[0] if return_document == ReturnDocument.AFTER else before, projection)
+
+    async def replace_one(self, query, replacement, upsert=False):
+        found = self._matching(query)
+        if found:
+            replacement = {**copy.deepcopy(replacement), "_id": found[0]["_id"]}
+            self.documents[found[0]["_id"]] = replacement
+            return SimpleNamespace(matched_count=1)
+        if upsert:
+            replacement = copy.deepcopy(replacement)
+            replacement.setdefault("_id", query.get("_id", str(uuid.uuid4())))
+            self.documents[replacement["_id"]] = replacement
+        return SimpleNamespace(matched_count=0)
+
+    async def delete_one(self, query):
+        found = self._matching(query)
+        if found:
+            del self.documents[found[0]["_id"]]
+        return SimpleNamespace(deleted_count=len(found[:1]))
+
+    async def delete_many(self, query):
+        found = self._matching(query)
+        for document in found:
+            del self.documents[document["_id"]]
+        return SimpleNamespace(deleted_count=len(found))
+
+    async def bulk_write(self, operations, ordered=True):
+        matched = deleted = 0
+        for operation in operations:
+            query = operation._filter
+            if isinstance(operation, UpdateOne):
+                result = await self.update_one(query, operation._doc, upsert=bool(operation._upsert))
+                matched += result.matched_count
+            elif isinstance(operation, ReplaceOne):
+                result = await self.replace_one(query, operation._doc, upsert=bool(operation._upsert))
+                matched += result.matched_count
+            elif isinstance(operation, DeleteOne):
+                deleted += (await self.delete_one(query)).deleted_count
+        return SimpleNamespace(matched_count=matched, modified_count=matched, deleted_count=deleted)
+
+    async def create_index(self, *args, **kwargs):
+        return None
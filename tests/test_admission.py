@@ -0,0 +1,76 @@
+import asyncio
+
+import httpx
+import pytest
+
+import middleware
+from middleware import AdmissionMiddleware
+
+pytestmark = pytest.mark.anyio
+
+async def ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+def client_for(app, peer="10.0.0.1"):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app, client=(peer, 1234)), base_url="http://testserver")
+
+async def checkout_statuses(client, count, headers=lambda i: {}):
+    return [(await client.post("/api/orders", headers=headers(i))).status_code for i in range(count)]
+
+async def test_rate_limiting_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("ADMISSION_RATE_LIMIT", raising=False)
+    app = AdmissionMiddleware(ok, **middleware.admission_settings())
+    async with client_for(app) as client:
+        assert set(await checkout_statuses(client, 20)) == {200}
+
+async def test_client_is_the_hop_appended_by_the_trusted_proxy():
+    app = AdmissionMiddleware(ok, rate_limit=True, trusted_proxies=1)
+    async with client_for(app) as client:
+        # A client rotating a spoofed X-Forwarded-For prefix is still keyed on the proxy's hop
+        statuses = await checkout_statuses(
+            client, 6, lambda i: {"X-Forwarded-For": f"198.51.100.{i}, 203.0.113.7"})
+        other = await client.post("/api/orders", headers={"X-Forwarded-For": "203.0.113.8"})
+
+    assert statuses == [200] * 5 + [429]
+    assert other.status_code == 200
+
+async def test_sessions_share_an_ip_without_throttling_each_other():
+    app = AdmissionMiddleware(ok, rate_limit=True, trusted_proxies=0)
+    async with client_for(app) as client:
+        first = await checkout_statuses(client, 6, lambda i: {"X-Session-Id": "customer-a"})
+        second = await checkout_statuses(client, 5, lambda i: {"X-Session-Id": "customer-b"})
+
+    assert first == [200] * 5 + [429]
+    assert second == [200] * 5
+
+async def test_fresh_session_ids_do_not_lift_the_ip_limit():
+    app = AdmissionMiddleware(ok, rate_limit=True, trusted_proxies=0)
+    _, burst = AdmissionMiddleware.RATES["checkout"]
+    ip_burst = burst * AdmissionMiddleware.IP_RATE_FACTOR
+    async with client_for(app) as client:
+        statuses = await checkout_statuses(client, ip_burst + 1, lambda i: {"X-Session-Id": f"session-{i}"})
+
+    assert statuses == [200] * ip_burst + [429]
+
+async def test_checkout_keeps_reserved_capacity_when_browsing_is_shed():
+    release = asyncio.Event()
+
+    async def slow(scope, receive, send):
+        await release.wait()
+        await ok(scope, receive, send)
+
+    app = AdmissionMiddleware(slow, max_in_flight=5, reserved_share=0.2)
+    async with client_for(app) as client:
+        browsing = [asyncio.ensure_future(client.get("/api/products")) for _ in range(4)]
+        while app.in_flight < 4:
+            await asyncio.sleep(0.01)
+        shed = await client.get("/api/products")
+        checkout = asyncio.ensure_future(client.post("/api/orders"))
+        while app.in_flight < 5:
+            await asyncio.sleep(0.01)
+        release.set()
+        responses = await asyncio.gather(*browsing, checkout)
+
+    assert shed.status_code == 503 and "retry-after" in shed.headers
+    assert [response.status_code for response in responses] == [200] * 5
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import archive
+import database
+from tests.fakes import FakeCollection
+
+pytestmark = pytest.mark.anyio
+
+class TouchedOrders(FakeCollection):
+    """Active collection whose listed orders change between the archive read and the delete"""
+
+    def __init__(self, documents, touched):
+        super().__init__(documents)
+        self.touched = touched
+
+    async def delete_one(self, query):
+        if query["_id"] in self.touched:
+            return await super().delete_one({"_id": None})
+        return await super().delete_one(query)
+
+def _order(order_id, created_at):
+    return {"_id": order_id, "orderId": order_id, "emailLower": "jane@example.com", "status": "completed",
+            "updatedAt": created_at, "createdAt": created_at}
+
+async def test_a_full_batch_of_kept_orders_sharing_a_timestamp_is_not_reread(monkeypatch):
+    old = datetime.utcnow() - timedelta(days=archive.ARCHIVE_AFTER_DAYS + 30)
+    source = TouchedOrders([_order(f"k{i}", old) for i in range(3)] + [_order("done", old + timedelta(days=1))],
+                           touched={"k0", "k1", "k2"})
+    archived = FakeCollection()
+    monkeypatch.setattr(archive, "checkpoints_collection", FakeCollection())
+
+    # Without a cursor past the kept orders this would re-read them until the deadline
+    deadline = asyncio.get_running_loop().time() + 5
+    result = await archive.archive_collection("orders", source, archived, batch_size=2, deadline=deadline)
+
+    assert result["done"] and result["archived"] == 1
+    assert sorted(source.documents) == ["k0", "k1", "k2"]
+    assert list(archived.documents) == ["done"]
+
+async def test_orders_mid_archive_are_listed_once(monkeypatch):
+    placed = datetime(2025, 1, 6, 9, 30)
+    monkeypatch.setattr(database, "orders_collection", FakeCollection([_order("a", placed), _order("b", placed)]))
+    monkeypatch.setattr(database, "orders_archive_collection", FakeCollection([_order("a", placed)]))
+    monkeypatch.setattr(database, "ORDER_COLLECTIONS", (
+        (database.orders_collection, "regular_order"), (FakeCollection(), "custom_order"),
+        (database.orders_archive_collection, "regular_order"), (FakeCollection(), "custom_order"),
+    ))
+
+    orders = await database.get_orders_by_email("jane@example.com")
+    history, has_more = await database.get_customer_order_history("jane@example.com", limit=2)
+
+    assert sorted(order["_id"] for order in orders) == ["a", "b"]
+    assert sorted(order["_id"] for order in history) == ["a", "b"] and not has_more
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import pytest
+
+import database
+import server
+from tests.fakes import FakeCollection
+
+pytestmark = pytest.mark.anyio
+
+def custom_order(order_id, status):
+    now = datetime(2025, 8, 7, 12, 0, 0)
+    return {"_id": order_id, "orderId": order_id, "status": status, "customerName": "Jane",
+            "email": "jane@example.com", "totalPrice": 20.0, "createdAt": now, "updatedAt": now}
+
+@pytest.fixture
+def orders(monkeypatch):
+    collection = FakeCollection([
+        custom_order("TMC1", "pending"), custom_order("TMC2", "pending"), custom_order("TMC3", "completed")
+    ])
+    monkeypatch.setattr(database, "custom_orders_collection", collection)
+    return collection
+
+@pytest.fixture
+def side_effects(monkeypatch):
+    calls = {"rollups": [], "emails": []}
+
+    async def record_status_changes(orders, status):
+        calls["rollups"].extend(order["orderId"] for order in orders)
+
+    async def send_status_update_emails(orders, status):
+        calls["emails"].extend(order["orderId"] for order in orders)
+
+    monkeypatch.setattr(server, "record_status_changes", record_status_changes)
+    monkeypatch.setattr(server, "send_status_update_emails", send_status_update_emails)
+    return calls
+
+async def test_results_rollups_and_emails_follow_the_writes_that_matched(client, orders, side_effects):
+    # TMC2 is cancelled by someone else after the endpoint read it but before its write
+    find_one_and_update = orders.find_one_and_update
+
+    async def racing_update(query, update, **kwargs):
+        if query["_id"] == "TMC2":
+            orders.documents["TMC2"]["status"] = "cancelled"
+        return await find_one_and_update(query, update, **kwargs)
+
+    orders.find_one_and_update = racing_update
+
+    response = await client.post("/api/custom-orders/bulk-status", json={
+        "status": "confirmed", "orderIds": ["TMC1", "TMC2", "TMC3", "TMC404"]
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["matched"] == 3
+    assert body["updated"] == 1
+    results = {result["orderId"]: result for result in body["results"]}
+    assert results["TMC1"]["success"] and results["TMC1"]["previousStatus"] == "pending"
+    assert not results["TMC2"]["success"]
+    assert not results["TMC3"]["success"]
+    assert results["TMC404"]["detail"] == "Order not found"
+    assert side_effects == {"rollups": ["TMC1"], "emails": ["TMC1"]}
+    assert orders.documents["TMC1"]["status"] == "confirmed"
+    assert orders.documents["TMC2"]["status"] == "cancelled"
+
+async def test_rejects_selections_over_the_limit(client, orders, side_effects, monkeypatch):
+    monkeypatch.setattr(server, "BULK_STATUS_LIMIT", 2)
+
+    response = await client.post("/api/custom-orders/bulk-status", json={
+        "status": "cancelled", "orderIds": ["TMC1", "TMC2", "TMC3"]
+    })
+
+    assert response.status_code == 400
+    assert all(order["status"] != "cancelled" for order in orders.documents.values())
+    assert side_effects == {"rollups": [], "emails": []}
@@ -0,0 +1,50 @@
+"""Cold-start import budget for the Vercel entry point (api/index.py)
+
+Imports it in a fresh interpreter under `python -X importtime` and fails if the total import time
+exceeds IMPORT_BUDGET_MS or a lazily-loaded dependency is pulled in at import.
+"""
+
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Only needed by specific routes; importing them at startup is a cold-start regression
+LAZY_MODULES = ["stripe", "jinja2", "aiofiles", "smtplib", "email.mime.multipart"]
+
+# About twice a typical cold import, so only real regressions fail on slower machines
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", "1500"))
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+def profile_imports():
+    """Return [(module, self_us, cumulative_us)] for a cold import of api/index.py"""
+    code = "import sys; sys.path.insert(0, 'api'); import index"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, timeout=60,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    modules = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us)))
+    return modules
+
+def test_cold_import_stays_lazy_and_within_budget():
+    modules = profile_imports()
+    imported = {name for name, _, _ in modules}
+    total_ms = sum(self_us for _, self_us, _ in modules) / 1000
+    slowest = sorted(modules, key=lambda module: module[2], reverse=True)[:10]
+    report = "\n".join(f"  {cumulative_us / 1000:8.1f}ms  {name}" for name, _, cumulative_us in slowest)
+
+    assert [name for name in LAZY_MODULES if name in imported] == []
+    assert total_ms <= IMPORT_BUDGET_MS, (
+        f"cold import took {total_ms:.1f}ms, over the {IMPORT_BUDGET_MS:.0f}ms budget; slowest:\n{report}"
+    )
@@ -0,0 +1,47 @@
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+async def test_failed_startup_is_retried_by_the_next_request(monkeypatch):
+    attempts = []
+
+    async def initialize():
+        attempts.append(len(attempts))
+        if len(attempts) == 1:
+            raise ConnectionError("mongo unavailable")
+
+    monkeypatch.setattr(server, "_initialize", initialize)
+    monkeypatch.setattr(server, "_init_task", None)
+
+    with pytest.raises(ConnectionError):
+        await server.ensure_initialized()
+    await server.ensure_initialized()
+    await server.ensure_initialized()
+
+    assert attempts == [0, 1]
+    assert server._init_task.done() and server._init_task.exception() is None
+
+async def test_a_failed_migration_is_retried_by_the_next_request(monkeypatch):
+    import migrations
+    import stripe_webhooks
+    runs = []
+
+    async def run_migrations():
+        runs.append(len(runs))
+        if len(runs) == 1:
+            raise RuntimeError("index build failed")
+
+    async def start_worker():
+        return None
+
+    monkeypatch.setattr(migrations, "run_migrations", run_migrations)
+    monkeypatch.setattr(stripe_webhooks, "start_worker", start_worker)
+    monkeypatch.setattr(server, "_init_task", None)
+
+    with pytest.raises(RuntimeError):
+        await server.ensure_initialized()
+    await server.ensure_initialized()
+
+    assert runs == [0, 1]
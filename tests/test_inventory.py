@@ -0,0 +1,101 @@
+import anyio
+import pytest
+
+import catalog_cache
+import inventory
+from tests.fakes import FakeCollection
+
+pytestmark = pytest.mark.anyio
+
+def _variant(product_id, available, color="Black", size="M"):
+    return {"_id": inventory.variant_id(product_id, color, size), "productId": product_id,
+            "color": color, "size": size, "available": available, "reserved": 0}
+
+def _item(product_id, quantity, color="Black", size="M"):
+    return {"productId": product_id, "selectedColor": color, "selectedSize": size, "quantity": quantity}
+
+@pytest.fixture
+def stock(monkeypatch):
+    variants = FakeCollection([_variant("shirt", 5), _variant("hat", 1)])
+    monkeypatch.setattr(inventory, "inventory_collection", variants)
+    monkeypatch.setattr(inventory, "inventory_reservations_collection", FakeCollection())
+    monkeypatch.setattr(inventory, "_last_sweep", float("inf"))
+    return variants
+
+@pytest.fixture
+def cached_catalog(monkeypatch):
+    entries = {("products",): (float("inf"), b"[]", '"p"'), ("category", "tees"): (float("inf"), b"[]", '"c"'),
+               ("categories",): (float("inf"), b"[]", '"k"')}
+    monkeypatch.setattr(catalog_cache, "_entries", entries)
+    return entries
+
+def _counts(stock, product_id):
+    variant = stock.documents[inventory.variant_id(product_id, "Black", "M")]
+    return variant["available"], variant["reserved"]
+
+async def test_shortage_rolls_back_the_whole_reservation(stock, cached_catalog):
+    with pytest.raises(inventory.OutOfStock):
+        await inventory.reserve_stock("session-1", [_item("shirt", 2), _item("hat", 2)])
+
+    assert _counts(stock, "shirt") == (5, 0)
+    assert _counts(stock, "hat") == (1, 0)
+    assert list(cached_catalog) == [("categories",)]
+
+async def test_reserve_commit_and_release_move_stock_and_drop_cached_products(stock, cached_catalog):
+    reservation_id = await inventory.reserve_stock("session-1", [_item("shirt", 2)])
+    assert _counts(stock, "shirt") == (3, 2)
+    assert list(cached_catalog) == [("categories",)]
+
+    await inventory.attach_payment_intent(reservation_id, "pi_1")
+    await inventory.commit_order_stock("pi_1", [_item("shirt", 2)])
+    assert _counts(stock, "shirt") == (3, 0)
+
+    cached_catalog[("products",)] = (float("inf"), b"[]", '"p"')
+    await inventory.reserve_stock("session-2", [_item("shirt", 1)])
+    cached_catalog[("products",)] = (float("inf"), b"[]", '"p"')
+    assert await inventory.release_reservation({"sessionKey": "session-2"})
+    assert _counts(stock, "shirt") == (3, 0)
+    assert ("products",) not in cached_catalog
+    assert not await inventory.release_reservation({"sessionKey": "session-2"})
+
+async def test_direct_sale_without_a_hold_takes_available_stock(stock, cached_catalog):
+    await inventory.commit_order_stock(None, [_item("hat", 1), _item("untracked", 3)])
+
+    assert _counts(stock, "hat") == (0, 0)
+    assert ("products",) not in cached_catalog
+    with pytest.raises(inventory.OutOfStock):
+        await inventory.commit_order_stock(None, [_item("hat", 1)])
+
+async def test_a_retried_order_commits_its_stock_once(stock, cached_catalog):
+    reservation_id = await inventory.reserve_stock("session-1", [_item("shirt", 2)])
+    await inventory.attach_payment_intent(reservation_id, "pi_1")
+
+    await inventory.commit_order_stock("pi_1", [_item("shirt", 2)])
+    await inventory.commit_order_stock("pi_1", [_item("shirt", 2)])
+
+    assert _counts(stock, "shirt") == (3, 0)
+
+async def test_a_retried_order_without_a_hold_takes_its_stock_once(stock, cached_catalog):
+    await inventory.commit_order_stock("pi_2", [_item("shirt", 2)])
+    await inventory.commit_order_stock("pi_2", [_item("shirt", 2)])
+
+    assert _counts(stock, "shirt") == (3, 0)
+
+async def test_a_catalog_load_overtaken_by_a_stock_change_is_not_cached(stock, cached_catalog):
+    cached_catalog.clear()
+    loading, release = anyio.Event(), anyio.Event()
+
+    async def load_products():
+        loading.set()
+        await release.wait()
+        return []
+
+    async with anyio.create_task_group() as tasks:
+        tasks.start_soon(catalog_cache.catalog_response, ("products",), load_products, list)
+        await loading.wait()
+        await inventory.reserve_stock("session-1", [_item("shirt", 1)])
+        release.set()
+
+    assert ("products",) not in cached_catalog
+    await catalog_cache.catalog_response(("products",), load_products, list)
+    assert ("products",) in cached_catalog
@@ -0,0 +1,29 @@
+import pytest
+
+import migrations
+from tests.fakes import FakeCollection
+
+pytestmark = pytest.mark.anyio
+
+async def test_seeding_skips_an_existing_catalog(monkeypatch):
+    products = FakeCollection([{"id": "owner-1", "name": "Owner's own shirt"}])
+    categories = FakeCollection([{"id": "custom", "name": "Custom"}])
+    monkeypatch.setattr(migrations, "products_collection", products)
+    monkeypatch.setattr(migrations, "categories_collection", categories)
+
+    await migrations.seed_categories()
+    await migrations.seed_products()
+
+    assert [product["id"] for product in products.documents.values()] == ["owner-1"]
+    assert [category["id"] for category in categories.documents.values()] == ["custom"]
+
+async def test_seeding_fills_an_empty_catalog(monkeypatch):
+    products, categories = FakeCollection(), FakeCollection()
+    monkeypatch.setattr(migrations, "products_collection", products)
+    monkeypatch.setattr(migrations, "categories_collection", categories)
+
+    await migrations.seed_categories()
+    await migrations.seed_products()
+
+    assert len(products.documents) == len(migrations.SEED_PRODUCTS)
+    assert len(categories.documents) == len(migrations.SEED_CATEGORIES)
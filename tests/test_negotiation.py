@@ -0,0 +1,33 @@
+from datetime import datetime
+
+import msgpack
+import pytest
+
+import database
+from tests.fakes import FakeCollection
+
+pytestmark = pytest.mark.anyio
+
+def vary(response):
+    return {value.strip().lower() for header in response.headers.get_list("vary") for value in header.split(",")}
+
+async def test_json_and_msgpack_responses_both_vary_on_accept(client):
+    json_response = await client.get("/api/sizes")
+    msgpack_response = await client.get("/api/sizes", headers={"Accept": "application/msgpack"})
+
+    assert json_response.headers["content-type"] == "application/json"
+    assert msgpack_response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(msgpack_response.content) == json_response.json()
+    assert "accept" in vary(json_response)
+    assert "accept" in vary(msgpack_response)
+
+async def test_compressed_responses_vary_on_accept_and_encoding(client, monkeypatch):
+    orders = [{"orderId": f"TMC{i}", "customerEmail": "jane@example.com", "items": [], "subtotal": 20.0,
+               "totalAmount": 20.0, "status": "pending", "createdAt": datetime(2025, 8, 7)} for i in range(50)]
+    monkeypatch.setattr(database, "orders_collection", FakeCollection(orders))
+
+    response = await client.get("/api/orders", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert {"accept", "accept-encoding"} <= vary(response)
+    assert len(response.json()) == 50
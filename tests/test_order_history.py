@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import database
+from tests.fakes import FakeCollection
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def collections(monkeypatch):
+    placed = datetime(2025, 8, 7, 12, 0, 0)
+    regular = FakeCollection([
+        # Three orders placed within the same second share a createdAt
+        {"_id": f"r{i}", "orderId": "TMC1723032000", "emailLower": "jane@example.com", "status": "pending",
+         "totalAmount": 20.0, "items": [{"quantity": 1}], "createdAt": placed}
+        for i in range(3)
+    ] + [
+        {"_id": "r9", "orderId": "TMC1723031000", "emailLower": "jane@example.com", "status": "pending",
+         "totalAmount": 20.0, "items": [{"quantity": 1}], "createdAt": placed - timedelta(hours=1)}
+    ])
+    custom = FakeCollection([
+        {"_id": "c1", "orderId": "TMC1723032000", "emailLower": "jane@example.com", "status": "pending",
+         "totalPrice": 25.0, "quantity": 1, "createdAt": placed}
+    ])
+    monkeypatch.setattr(database, "ORDER_COLLECTIONS", (
+        (regular, "regular_order"), (custom, "custom_order"),
+        (FakeCollection(), "regular_order"), (FakeCollection(), "custom_order"),
+    ))
+
+async def test_pages_do_not_skip_orders_sharing_a_timestamp(collections):
+    seen = []
+    before = before_id = None
+    while True:
+        page, has_more = await database.get_customer_order_history(
+            "Jane@Example.com", limit=2, before=before, before_id=before_id)
+        seen.extend(order["_id"] for order in page)
+        if not has_more:
+            break
+        before, before_id = page[-1]["createdAt"], page[-1]["_id"]
+
+    assert sorted(seen) == ["c1", "r0", "r1", "r2", "r9"]
+    assert len(seen) == len(set(seen))
+    assert seen[-1] == "r9"
+
+async def test_history_endpoint_returns_both_cursor_parts(client, collections):
+    response = await client.get("/api/customers/jane@example.com/orders", params={"limit": 2})
+    body = response.json()
+    assert response.status_code == 200
+    assert body["nextBeforeId"] == "r1"
+
+    response = await client.get("/api/customers/jane@example.com/orders",
+                                params={"limit": 2, "before": body["nextBefore"], "beforeId": body["nextBeforeId"]})
+    assert [order["type"] for order in response.json()["orders"]] == ["regular_order", "custom_order"]
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import database
+from tests.fakes import FakeCollection
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2025, 8, 1, 12, 0, 0)
+
+def regular_order(number, status, email="jane@example.com"):
+    return {"_id": f"r{number}", "orderId": f"TMC{number}", "customerEmail": email, "emailLower": email.lower(),
+            "items": [{"productId": "shirt", "quantity": 1, "price": 20.0}], "subtotal": 20.0,
+            "totalAmount": 20.0, "status": status, "type": "regular_order",
+            "createdAt": START + timedelta(days=number), "updatedAt": START + timedelta(days=number)}
+
+def custom_order(number, status, style="regular"):
+    return {"_id": f"c{number}", "orderId": f"TMC{number}", "customerName": "Jane", "email": "jane@example.com",
+            "emailLower": "jane@example.com", "shirtStyle": style, "totalPrice": 25.0, "status": status,
+            "createdAt": START + timedelta(days=number), "updatedAt": START + timedelta(days=number)}
+
+@pytest.fixture(autouse=True)
+def orders(monkeypatch):
+    monkeypatch.setattr(database, "orders_collection", FakeCollection([
+        regular_order(1, "pending"), regular_order(2, "shipped", "Bob@Example.com"),
+        regular_order(3, "pending"), regular_order(4, "delivered"),
+    ]))
+    monkeypatch.setattr(database, "custom_orders_collection", FakeCollection([
+        custom_order(1, "pending"), custom_order(2, "completed", "sweatshirt"),
+    ]))
+
+async def test_filters_narrow_the_regular_order_list(client):
+    by_status = await client.get("/api/orders", params={"status": "pending"})
+    by_customer = await client.get("/api/orders", params={"customer": "bob@EXAMPLE.com"})
+    by_dates = await client.get("/api/orders", params={"from": "2025-08-03T12:00:00", "to": "2025-08-05T12:00:00"})
+
+    assert [order["orderId"] for order in by_status.json()] == ["TMC3", "TMC1"]
+    assert [order["orderId"] for order in by_customer.json()] == ["TMC2"]
+    assert [order["orderId"] for order in by_dates.json()] == ["TMC3", "TMC2"]
+
+async def test_custom_order_type_is_rejected_on_the_regular_order_list(client):
+    response = await client.get("/api/orders", params={"type": "custom_order"})
+    regular = await client.get("/api/orders", params={"type": "regular_order"})
+
+    assert response.status_code == 400
+    assert len(regular.json()) == 4
+
+async def test_summary_rows_carry_the_order_id_and_list_columns_only(client):
+    regular = (await client.get("/api/orders", params={"view": "summary", "limit": 1})).json()
+    custom = (await client.get("/api/custom-orders", params={"view": "summary", "style": "sweatshirt"})).json()
+
+    assert regular == [{"id": "r4", "orderId": "TMC4", "customerEmail": "jane@example.com", "totalAmount": 20.0,
+                        "status": "delivered", "type": "regular_order", "createdAt": "2025-08-05T12:00:00"}]
+    assert [(order["id"], order["orderId"]) for order in custom] == [("c2", "TMC2")]
+    assert "shippingAddress" not in custom[0]
+
+async def test_limit_and_skip_page_through_newest_first(client):
+    pages = []
+    for skip in (0, 2, 4):
+        page = await client.get("/api/orders", params={"view": "summary", "limit": 2, "skip": skip})
+        pages.append([order["id"] for order in page.json()])
+
+    assert pages == [["r4", "r3"], ["r2", "r1"], []]
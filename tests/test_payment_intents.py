@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+
+import pytest
+
+import payment_intents
+import server
+import stripe_client
+import stripe_webhooks
+from tests.fakes import FakeCollection
+
+pytestmark = pytest.mark.anyio
+
+class FakeStripe:
+    """PaymentIntent create/retrieve/modify backed by a dict"""
+
+    class error:
+        class StripeError(Exception):
+            pass
+
+    def __init__(self):
+        self.intents = {}
+        self.created = 0
+        self.PaymentIntent = SimpleNamespace(create=self.create, retrieve=self.retrieve, modify=self.modify)
+
+    def create(self, amount, currency, idempotency_key=None, **params):
+        intent = SimpleNamespace(id=f"pi_{self.created}", client_secret=f"pi_{self.created}_secret",
+                                 amount=amount, status="requires_payment_method")
+        self.created += 1
+        self.intents[intent.id] = intent
+        return intent
+
+    def retrieve(self, intent_id):
+        return self.intents[intent_id]
+
+    def modify(self, intent_id, amount, **params):
+        self.intents[intent_id].amount = amount
+        return self.intents[intent_id]
+
+@pytest.fixture
+def stripe(monkeypatch):
+    fake = FakeStripe()
+    monkeypatch.setattr(payment_intents, "get_stripe", lambda: fake)
+    monkeypatch.setattr(stripe_client, "STRIPE_SECRET_KEY", "sk_test_fake")
+    monkeypatch.setattr(payment_intents, "payment_intents_collection", FakeCollection())
+    return fake
+
+CART = {"type": "regular_order", "items": [{"productId": "1", "quantity": 1}]}
+
+async def test_reuses_the_open_intent_for_the_same_cart(stripe):
+    first = await payment_intents.get_or_create_payment_intent("session-1", 2000, "usd", CART, {})
+    second = await payment_intents.get_or_create_payment_intent("session-1", 2000, "usd", CART, {})
+
+    assert first == second
+    assert stripe.created == 1
+
+async def test_does_not_reuse_an_intent_stripe_reports_as_paid(stripe):
+    # No webhook closed the registry entry, but Stripe already took the payment
+    _, intent_id = await payment_intents.get_or_create_payment_intent("session-1", 2000, "usd", CART, {})
+    stripe.intents[intent_id].status = "succeeded"
+
+    _, next_id = await payment_intents.get_or_create_payment_intent("session-1", 2000, "usd", CART, {})
+
+    assert next_id != intent_id
+    assert stripe.created == 2
+
+async def test_placing_an_order_closes_its_intent(client, stripe, monkeypatch):
+    async def noop(*args, **kwargs):
+        return None
+
+    async def create_order(order):
+        return "order-1"
+
+    for name in ("commit_order_stock", "record_order_created", "send_order_emails"):
+        monkeypatch.setattr(server, name, noop)
+    monkeypatch.setattr(server, "create_order", create_order)
+    monkeypatch.setattr(stripe_webhooks, "reconcile_order_payment", noop)
+    checkout = {"amount": 2000, "sessionId": "session-1", "orderData": {"type": "regular_order"}}
+
+    response = await client.post("/api/create-payment-intent", json=checkout)
+    intent_id = response.json()["paymentIntentId"]
+    response = await client.post("/api/orders", json={
+        "customerEmail": "jane@example.com", "items": [], "subtotal": 20, "totalAmount": 20,
+        "paymentIntentId": intent_id
+    })
+    assert response.status_code == 200
+
+    response = await client.post("/api/create-payment-intent", json=checkout)
+
+    assert response.json()["paymentIntentId"] != intent_id
+    assert stripe.created == 2
+
+async def test_checkout_fails_clearly_without_a_stripe_key(client, stripe, monkeypatch):
+    monkeypatch.setattr(stripe_client, "STRIPE_SECRET_KEY", None)
+
+    response = await client.post("/api/create-payment-intent", json={"amount": 2000, "sessionId": "session-1"})
+
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Stripe secret key not configured"
+    assert stripe.created == 0
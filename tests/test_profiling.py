@@ -0,0 +1,39 @@
+import httpx
+import pytest
+
+from middleware import ProfilingMiddleware
+
+pytestmark = pytest.mark.anyio
+
+async def hello(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b"hello"})
+
+def profiled_client(**options):
+    app = ProfilingMiddleware(hello, token="s3cret", **options)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver")
+
+@pytest.mark.parametrize("token", ["josé".encode(), b"\xff\xfe", b"wrong"])
+async def test_untrusted_profile_tokens_get_the_normal_response(token):
+    async with profiled_client() as client:
+        response = await client.get("/", headers={"X-Profile": token})
+        by_query = await client.get("/?profile=%FF%FE")
+
+    assert (response.status_code, response.text) == (200, "hello")
+    assert (by_query.status_code, by_query.text) == (200, "hello")
+
+async def test_the_admin_token_returns_the_profile():
+    pytest.importorskip("pyinstrument")
+    async with profiled_client() as client:
+        response = await client.get("/", headers={"X-Profile": "s3cret", "X-Profile-Format": "speedscope"})
+
+    assert response.headers["content-type"] == "application/json"
+
+def test_only_the_newest_sampled_profiles_are_kept(tmp_path):
+    for second in range(5):
+        (tmp_path / f"20250807T12000{second}000000-GET-api_products.speedscope.json").write_text("{}")
+    middleware = ProfilingMiddleware(hello, sample_rate=1.0, profiles_dir=str(tmp_path), max_profiles=2)
+
+    middleware._prune()
+
+    assert sorted(path.name[:15] for path in tmp_path.iterdir()) == ["20250807T120003", "20250807T120004"]
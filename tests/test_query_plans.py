@@ -0,0 +1,192 @@
+"""Query plan regression guard for database.py and the modules that query Mongo directly
+
+Runs each query function against the scratch test database on a local mongod, captures the
+commands it issues, explains them, and fails if a hot path (cart, product, order, payment
+lookups) falls back to a COLLSCAN. Skipped when no mongod is reachable at MONGO_URL; add missing
+indexes as new migrations.
+"""
+
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+import archive
+import database
+import inventory
+import monitoring
+import payment_intents
+import stripe_webhooks
+from migrations import run_migrations
+
+pytestmark = pytest.mark.anyio
+
+# Commands that read or modify existing documents, and can therefore be explained
+EXPLAINABLE = {"find", "count", "distinct", "aggregate", "update", "delete", "findAndModify"}
+
+# Functions whose full scan is intended (whole-catalog listing)
+ALLOWED_COLLSCAN = {"get_all_products"}
+
+PLAN_CUSTOM_ORDER_ID = "plan-custom-order"
+PLAN_ITEM = {"productId": "1", "selectedColor": "Black", "selectedSize": "M", "quantity": 1}
+
+def _mongod_reachable() -> bool:
+    client = MongoClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+    finally:
+        client.close()
+
+@pytest.fixture
+def captured(monkeypatch):
+    """Explainable commands the backend's Mongo client issues, via its registered command listener"""
+    commands = []
+    started = monitoring.command_timings.started
+
+    def capture(event):
+        if event.command_name in EXPLAINABLE and event.database_name == database.db.name:
+            commands.append((event.command_name, {key: value for key, value in event.command.items()
+                                                  if not key.startswith("$") and key not in ("lsid", "txnNumber")}))
+        started(event)
+
+    monkeypatch.setattr(monitoring.command_timings, "started", capture)
+    return commands
+
+@pytest.fixture
+def stripe(monkeypatch):
+    """Just enough of the Stripe SDK to create a payment intent"""
+    def create(**params):
+        return SimpleNamespace(id="pi_plan_new", client_secret="pi_plan_new_secret", status="requires_payment_method")
+
+    fake = SimpleNamespace(PaymentIntent=SimpleNamespace(create=create))
+    monkeypatch.setattr(payment_intents, "get_stripe", lambda: fake)
+
+def winning_stages(explain):
+    """Every stage name in every winningPlan of an explain result"""
+    stages = []
+
+    def walk(node, in_plan):
+        if isinstance(node, dict):
+            if in_plan and "stage" in node:
+                stages.append(node["stage"])
+            for key, value in node.items():
+                walk(value, in_plan or key == "winningPlan")
+        elif isinstance(node, list):
+            for item in node:
+                walk(item, in_plan)
+
+    walk(explain, False)
+    return stages
+
+async def seed():
+    now = datetime.utcnow()
+    await database.create_order({
+        "orderId": "TMCPLAN1", "customerEmail": "Plan@Example.com", "items": [{"productId": "1", "quantity": 1}],
+        "subtotal": 20, "totalAmount": 20, "status": "pending", "type": "regular_order",
+        "paymentIntentId": "pi_plan", "createdAt": now, "updatedAt": now
+    })
+    await database.create_custom_order({
+        "_id": PLAN_CUSTOM_ORDER_ID, "orderId": "TMCPLAN2", "customerName": "Plan", "email": "plan@example.com",
+        "shirtStyle": "regular", "shirtColor": "Black", "size": "M", "quantity": 1, "totalPrice": 20, "status": "pending",
+        "type": "custom_order", "createdAt": now, "updatedAt": now
+    })
+    await database.add_to_cart({
+        "sessionId": "plan-session", "productId": "1", "quantity": 1, "selectedColor": "Black",
+        "selectedSize": "M", "printLocation": "front"
+    })
+    await inventory.set_stock("1", [{"color": "Black", "size": "M", "available": 5}])
+    old = now - timedelta(days=archive.ARCHIVE_AFTER_DAYS + 1)
+    await database.create_custom_order({
+        "orderId": "TMCPLAN3", "customerName": "Plan", "email": "plan@example.com", "shirtStyle": "regular",
+        "shirtColor": "Black", "size": "M", "quantity": 1, "totalPrice": 20, "status": "completed",
+        "type": "custom_order", "paymentIntentId": "pi_plan_old", "createdAt": old, "updatedAt": old
+    })
+    await database.stripe_events_collection.insert_many([
+        {"eventId": "evt_plan", "type": "payment_intent.succeeded", "paymentIntentId": "pi_plan",
+         "payload": {"id": "pi_plan"}, "status": "pending", "attempts": 0, "receivedAt": now},
+        {"eventId": "evt_plan_stale", "type": "payment_intent.succeeded", "paymentIntentId": "pi_plan_stale",
+         "payload": {"id": "pi_plan_stale"}, "status": "processing", "attempts": 1, "receivedAt": now,
+         "claimedAt": now - stripe_webhooks.PROCESSING_LEASE * 2},
+    ])
+
+def query_functions():
+    """(name, coroutine factory) for every query function"""
+    since = datetime.utcnow() - timedelta(days=30)
+    return [
+        ("get_all_products", lambda: database.get_all_products()),
+        ("get_product_by_id", lambda: database.get_product_by_id("1")),
+        ("get_products_by_category", lambda: database.get_products_by_category("teachers")),
+        ("update_product", lambda: database.update_product("1", {"inStock": True})),
+        ("get_all_categories", lambda: database.get_all_categories()),
+        ("get_cart", lambda: database.get_cart("plan-session")),
+        ("add_to_cart", lambda: database.add_to_cart({
+            "sessionId": "plan-session", "productId": "2", "quantity": 1, "selectedColor": "Grey",
+            "selectedSize": "L", "printLocation": "front"})),
+        ("update_cart_item", lambda: database.update_cart_item("plan-session", 0, {"quantity": 2})),
+        ("remove_from_cart", lambda: database.remove_from_cart("plan-session", 1)),
+        ("get_custom_orders", lambda: database.get_custom_orders()),
+        ("get_custom_orders[status]", lambda: database.get_custom_orders(
+            database.build_order_filter("pending", since), summary=True, limit=50)),
+        ("get_custom_order_by_id", lambda: database.get_custom_order_by_id("TMCPLAN2")),
+        ("update_custom_order_status", lambda: database.update_custom_order_status("TMCPLAN2", "confirmed")),
+        ("find_custom_orders", lambda: database.find_custom_orders({"orderId": {"$in": ["TMCPLAN2"]}})),
+        ("update_custom_orders_status", lambda: database.update_custom_orders_status(
+            [{"_id": PLAN_CUSTOM_ORDER_ID}], ["confirmed"], "in-progress")),
+        ("update_order_payment", lambda: database.update_order_payment("pi_plan", "paid", "confirmed", ["pending"])),
+        ("get_orders_by_email", lambda: database.get_orders_by_email("plan@example.com")),
+        ("get_customer_order_history", lambda: database.get_customer_order_history("PLAN@example.com")),
+        ("get_all_orders", lambda: database.get_all_orders()),
+        ("get_all_orders[filters]", lambda: database.get_all_orders(
+            database.build_order_filter("pending", since, customer="plan@example.com"), summary=True)),
+        ("get_or_create_payment_intent", lambda: payment_intents.get_or_create_payment_intent(
+            "plan-session", 2000, "usd", {"type": "regular_order", "items": [PLAN_ITEM]}, {})),
+        ("close_payment_intent", lambda: payment_intents.close_payment_intent("pi_plan_new", "ordered")),
+        ("process_event", lambda: stripe_webhooks.process_event("evt_plan")),
+        ("reconcile_order_payment", lambda: stripe_webhooks.reconcile_order_payment("pi_plan")),
+        ("start_worker", lambda: stripe_webhooks.start_worker()),
+        ("get_stock", lambda: inventory.get_stock("1")),
+        ("reserve_stock", lambda: inventory.reserve_stock("plan-session", [PLAN_ITEM])),
+        ("commit_order_stock", lambda: inventory.commit_order_stock("pi_plan", [PLAN_ITEM])),
+        ("release_reservation", lambda: inventory.release_reservation({"paymentIntentId": "pi_plan"})),
+        ("release_expired_reservations", lambda: inventory.release_expired_reservations()),
+        ("archive_orders", lambda: archive.archive_orders()),
+        ("get_custom_order_by_id[archived]", lambda: database.get_custom_order_by_id("TMCPLAN3")),
+        ("update_order_payment[archived]", lambda: database.update_order_payment("pi_plan_old", "refunded")),
+        ("update_custom_order_status[archived]", lambda: database.update_custom_order_status("TMCPLAN3", "in-progress")),
+        ("clear_cart", lambda: database.clear_cart("plan-session")),
+        ("delete_product", lambda: database.delete_product("missing-product")),
+    ]
+
+async def test_hot_paths_do_not_scan_collections(captured, stripe):
+    if not _mongod_reachable():
+        pytest.skip(f"no mongod reachable at {os.environ['MONGO_URL']}")
+
+    await database.client.drop_database(database.db.name)
+    try:
+        await run_migrations()
+        await seed()
+
+        plans = []
+        for name, call in query_functions():
+            captured.clear()
+            await call()
+            for command_name, command in list(captured):
+                explain = await database.db.command({"explain": command, "verbosity": "queryPlanner"})
+                plans.append((name, command_name, command.get(command_name), winning_stages(explain)))
+        await stripe_webhooks.stop_worker()
+    finally:
+        await database.client.drop_database(database.db.name)
+
+    explained = {name for name, _, _, _ in plans}
+    assert {"get_or_create_payment_intent", "close_payment_intent", "process_event",
+            "reconcile_order_payment", "start_worker"} <= explained
+    collscans = [f"{name}: {command_name} on {collection} -> {' > '.join(stages)}"
+                 for name, command_name, collection, stages in plans
+                 if "COLLSCAN" in stages and name not in ALLOWED_COLLSCAN]
+    assert collscans == []
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+import database
+from tests.fakes import FakeCollection
+
+pytestmark = pytest.mark.anyio
+
+class GatedCarts(FakeCollection):
+    """Cart reads block until released, so tests control which calls overlap"""
+
+    def __init__(self, documents=()):
+        super().__init__(documents)
+        self.reads = 0
+        self.gate = asyncio.Event()
+        self.error = None
+
+    async def find_one(self, query=None, projection=None):
+        self.reads += 1
+        await self.gate.wait()
+        if self.error:
+            raise self.error
+        return await super().find_one(query, projection)
+
+@pytest.fixture
+def carts(monkeypatch):
+    collection = GatedCarts([{"sessionId": "s1", "items": [{"productId": "1", "quantity": 1}]}])
+    monkeypatch.setattr(database, "carts_collection", collection)
+    return collection
+
+async def test_concurrent_reads_share_one_query_and_get_their_own_copy(carts):
+    calls = [asyncio.ensure_future(database.get_cart("s1")) for _ in range(5)]
+    await asyncio.sleep(0)
+    carts.gate.set()
+    results = await asyncio.gather(*calls)
+
+    assert carts.reads == 1
+    results[0]["items"].append({"productId": "2"})
+    assert all(len(result["items"]) == 1 for result in results[1:])
+    assert not database._inflight
+
+async def test_a_read_after_a_write_does_not_join_the_earlier_query(carts):
+    first = asyncio.ensure_future(database.get_cart("s1"))
+    await asyncio.sleep(0)
+    database._forget_cart("s1")
+    second = asyncio.ensure_future(database.get_cart("s1"))
+    await asyncio.sleep(0)
+    carts.gate.set()
+    await asyncio.gather(first, second)
+
+    assert carts.reads == 2
+
+async def test_errors_reach_every_caller_and_the_next_read_retries(carts):
+    carts.error = RuntimeError("mongo went away")
+    calls = [asyncio.ensure_future(database.get_cart("s1")) for _ in range(3)]
+    await asyncio.sleep(0)
+    carts.gate.set()
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    carts.error = None
+    assert (await database.get_cart("s1"))["sessionId"] == "s1"
+    assert carts.reads == 2
+
+async def test_a_cancelled_caller_does_not_cancel_the_shared_query(carts):
+    leader = asyncio.ensure_future(database.get_cart("s1"))
+    follower = asyncio.ensure_future(database.get_cart("s1"))
+    await asyncio.sleep(0)
+    leader.cancel()
+    carts.gate.set()
+
+    assert (await follower)["sessionId"] == "s1"
+    assert carts.reads == 1
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import stripe_webhooks
+from tests.fakes import FakeCollection
+
+pytestmark = pytest.mark.anyio
+
+def stored_event(event_id, status, **fields):
+    return {"_id": event_id, "eventId": event_id, "type": "payment_intent.succeeded", "paymentIntentId": "pi_1",
+            "payload": {}, "status": status, "attempts": 1, "receivedAt": datetime(2025, 8, 7, 12, 0), **fields}
+
+@pytest.fixture
+def events(monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(stripe_webhooks, "stripe_events_collection", collection)
+    return collection
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    queued = []
+    monkeypatch.setattr(stripe_webhooks, "enqueue", queued.append)
+    yield queued
+    if stripe_webhooks._worker is not None:
+        stripe_webhooks._worker.cancel()
+        stripe_webhooks._worker = None
+
+async def test_start_worker_leaves_events_claimed_by_a_live_worker(events, enqueued):
+    now = datetime.utcnow()
+    for event in (
+        stored_event("evt_pending", "pending"),
+        stored_event("evt_live", "processing", claimedAt=now - timedelta(seconds=5)),
+        stored_event("evt_stale", "processing", claimedAt=now - stripe_webhooks.PROCESSING_LEASE * 2),
+        stored_event("evt_legacy", "processing"),
+    ):
+        await events.insert_one(event)
+
+    await stripe_webhooks.start_worker()
+
+    assert sorted(enqueued) == ["evt_legacy", "evt_pending", "evt_stale"]
+    assert events.documents["evt_live"]["status"] == "processing"
+    assert events.documents["evt_stale"]["status"] == "pending"
+
+async def test_an_event_is_applied_once(events, monkeypatch):
+    applied = []
+
+    async def update_order_payment(payment_intent_id, payment_status, status, from_statuses):
+        applied.append(payment_intent_id)
+        return {"status": "pending", "createdAt": datetime(2025, 8, 7)}, "regular_order"
+
+    async def noop(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(stripe_webhooks, "update_order_payment", update_order_payment)
+    monkeypatch.setattr(stripe_webhooks, "close_payment_intent", noop)
+    monkeypatch.setattr(stripe_webhooks, "record_status_change", noop)
+    await events.insert_one(stored_event("evt_1", "pending", attempts=0))
+
+    await stripe_webhooks.process_event("evt_1")
+    await stripe_webhooks.process_event("evt_1")
+
+    assert applied == ["pi_1"]
+    assert events.documents["evt_1"]["status"] == "processed"
+    assert events.documents["evt_1"]["claimedAt"] is not None